@@ -1,5 +1,6 @@
 import React, { createContext, useState, useEffect, useContext } from "react";
 import { jwtDecode } from "jwt-decode";
+import axios from "axios";
 
 interface CustomJwtPayload {
   is_admin: boolean;
@@ -44,13 +45,19 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({
   };
 
   const logout = () => {
-    document.cookie = "token=; Max-Age=0; path=/";
-
     setIsAuthenticated(false);
     setIsAdmin(false);
 
-    window.dispatchEvent(new Event("tokenUpdate"));
-    checkAuthStatus();
+    // Revoke the token server-side, then drop the cookie either way
+    const apiUrl = import.meta.env.VITE_API_URL;
+    axios
+      .post(`${apiUrl}/api/logout`, {}, { withCredentials: true })
+      .catch(() => {})
+      .finally(() => {
+        document.cookie = "token=; Max-Age=0; path=/";
+        window.dispatchEvent(new Event("tokenUpdate"));
+        checkAuthStatus();
+      });
   };
 
   useEffect(() => {
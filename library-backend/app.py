@@ -1,34 +1,56 @@
 import os
 from flask import Flask
 from config import Config
-from extensions import db, mail
-from flask_migrate import Migrate
+from extensions import db
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from routes.auth import auth_bp
 from routes.userroutes import user_bp
 from routes.books import books_bp
 from routes.usermanagement import user_bp as user_management_routes
-import logging
 from routes.books import borrow_bp
-from dotenv import load_dotenv 
+from routes.metrics import metrics_bp
+from routes.admin import admin_bp
+from utils.metrics import init_metrics
+from utils.db_routing import init_replica_routing
+from utils.logging_pipeline import init_logging
+from utils.json_provider import init_json
+from commands.lazy import LazyAppGroup
 
-def create_app():
+# Imported on first use by `flask <name>` (see commands/lazy.py)
+CLI_COMMANDS = {
+    'search': 'commands.search:search_cli',
+    'bench': 'commands.bench:bench_cli',
+    'borrows': 'commands.borrows:borrows_cli',
+    'outbox': 'commands.outbox:outbox_cli',
+    'seed': 'commands.seed:seed_command',
+    'stats': 'commands.stats:stats_cli',
+    'tokens': 'commands.tokens:tokens_cli',
+}
+
+def create_app(config_overrides=None):
     app = Flask(__name__)
     app.config.from_object(Config)
+    if config_overrides:
+        app.config.update(config_overrides)
     register_extensions(app)
     register_blueprints(app)
-    configure_logging()
+    register_commands(app)
+    init_logging(app)
     return app
 
 def register_extensions(app):
+    init_json(app)
     db.init_app(app)
-    mail.init_app(app)
-    Migrate(app, db)
+    # Mail is set up by the outbox worker on its first send (services/outbox_service.py)
+    if os.environ.get("FLASK_RUN_FROM_CLI") == "true":
+        # Only `flask db ...` needs Migrate, and alembic is the slowest import we have
+        from flask_migrate import Migrate
+        Migrate(app, db)
     JWTManager(app)
-    
-    load_dotenv()
-    
+    init_metrics(app, db)
+    init_replica_routing(app)
+
     frontend_url = os.getenv("FRONTEND_URL")
     if frontend_url and frontend_url.endswith('/'):
         frontend_url = frontend_url[:-1]
@@ -46,16 +68,28 @@ def register_blueprints(app):
     app.register_blueprint(user_bp, url_prefix="/api/user")
     app.register_blueprint(books_bp, url_prefix="/api/books")
     app.register_blueprint(user_management_routes, url_prefix="/api/admin/user")
+    app.register_blueprint(admin_bp, url_prefix="/api/admin")
     app.register_blueprint(borrow_bp, url_prefix='/api/borrow')
+    app.register_blueprint(metrics_bp, url_prefix='/metrics')
 
-def configure_logging():
-    logging.basicConfig(level=logging.DEBUG)
-    logger = logging.getLogger(__name__)
-    logger.debug("App started and logging configured")
+def register_commands(app):
+    app.cli = LazyAppGroup(CLI_COMMANDS, commands=app.cli.commands)
 
 
 if __name__ == "__main__":
+    from services.search_service import create_search_index, search_index_ready
+    from services.stats_service import reconcile_stats
+    from models import StatCounter
+
     app = create_app()
     with app.app_context():
         db.create_all()
+        # Only what a fresh create_all() database lacks; rebuilding the index or
+        # recounting on every start is slow on big tables (see `flask search` / `flask stats`)
+        if not search_index_ready():
+            with db.engine.begin() as conn:
+                create_search_index(conn)
+        if db.session.execute(db.select(StatCounter.name).limit(1)).first() is None:
+            reconcile_stats()
+        db.session.remove()
     app.run(debug=True)
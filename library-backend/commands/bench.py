@@ -0,0 +1,702 @@
+import io
+import logging
+import os
+import shutil
+import time
+import threading
+import statistics
+import tracemalloc
+import uuid
+from types import SimpleNamespace
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import click
+import jwt
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import func, select
+from models import db, Book, User, Borrow, BorrowStatus
+from services.search_service import apply_book_search, search_index_ready
+from routes.decorator import token_required
+from utils.token_cache import ClaimsCache
+from utils.revocation_list import RevocationList
+from utils import logging_pipeline, json_provider
+from utils.rate_limit import get_rate_limiter
+from utils.page_counts import get_count_cache
+from utils.query_counter import count_queries
+from services import password_service, serializers, read_models
+from commands import route_bench, startup_bench
+
+bench_cli = AppGroup('bench', help='Micro-benchmarks against the configured database.')
+
+
+def _time_runs(fn, runs):
+    fn()  # warm-up
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "mean": statistics.fmean(samples),
+        "p50": samples[len(samples) // 2],
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+
+def _report(label, stats):
+    click.echo(f"{label:<12} mean {stats['mean']:8.2f} ms   p50 {stats['p50']:8.2f} ms   p95 {stats['p95']:8.2f} ms")
+
+
+@bench_cli.command('search')
+@click.option('--term', 'terms', multiple=True, default=['the', 'harry pot', 'tolkien'], show_default=True)
+@click.option('--search-by', type=click.Choice(['title', 'author']), default='title', show_default=True)
+@click.option('--limit', default=10, show_default=True)
+@click.option('--runs', default=50, show_default=True)
+def search(terms, search_by, limit, runs):
+    """Compare ilike scans with the full-text index for the book search endpoints."""
+    if not search_index_ready():
+        raise click.ClickException("Search index not found, run `flask search rebuild` first.")
+
+    column = Book.title if search_by == 'title' else Book.author
+    click.echo(f"{Book.query.count()} books, {runs} runs per term, page size {limit}\n")
+
+    for term in terms:
+        def ilike_page():
+            query = Book.query.filter_by(is_deleted=False).filter(column.ilike(f'%{term}%'))
+            query.count()
+            query.limit(limit).all()
+
+        def fts_page():
+            query = apply_book_search(Book.query.filter_by(is_deleted=False), term, search_by)
+            query.count()
+            query.limit(limit).all()
+
+        click.echo(f"'{term}'")
+        ilike = _time_runs(ilike_page, runs)
+        fts = _time_runs(fts_page, runs)
+        _report("  ilike", ilike)
+        _report("  fulltext", fts)
+        click.echo(f"  speed-up     {ilike['mean'] / fts['mean']:.1f}x\n")
+
+
+@bench_cli.command('auth')
+@click.option('--requests', 'n', default=20000, show_default=True)
+@click.option('--revoked', default=100000, show_default=True,
+              help='Revoked users and tokens in the list the revocation check runs against.')
+def auth(n, revoked):
+    """Per-request cost of token_required with and without the claims cache, and of the revocation check."""
+    app = current_app._get_current_object()
+    payload = {
+        "id": 1,
+        "email": "bench@example.com",
+        "is_admin": False,
+        "gen": 0,
+        "jti": uuid.uuid4().hex,
+        "exp": datetime.now(timezone.utc) + timedelta(minutes=30)
+    }
+    token = jwt.encode(payload, app.config['SECRET_KEY'], algorithm='HS256')
+    protected = token_required(lambda user_data: user_data)
+    saved = app.extensions.get('claims_cache')
+
+    def run(cache):
+        app.extensions['claims_cache'] = cache
+        with app.test_request_context(headers={"Cookie": f"token={token}"}):
+            protected()
+            start = time.perf_counter()
+            for _ in range(n):
+                protected()
+            return (time.perf_counter() - start) / n * 1e6
+
+    try:
+        uncached = run(ClaimsCache(0))
+        cache = ClaimsCache(app.config.get('AUTH_CLAIMS_CACHE_SIZE', 4096))
+        cached = run(cache)
+    finally:
+        if saved is None:
+            app.extensions.pop('claims_cache', None)
+        else:
+            app.extensions['claims_cache'] = saved
+
+    click.echo(f"{n} calls")
+    click.echo(f"  jwt.decode every call  {uncached:8.2f} us/request")
+    click.echo(f"  claims cache           {cached:8.2f} us/request")
+    click.echo(f"  speed-up               {uncached / cached:8.1f}x   {cache.stats()}")
+
+    revocations = RevocationList()
+    expires_at = time.time() + 3600
+    for i in range(revoked):
+        revocations.revoke_user(i + 2, 1, expires_at)
+        revocations.revoke_token(uuid.uuid4().hex, expires_at)
+    claims = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+    start = time.perf_counter()
+    for _ in range(n):
+        revocations.is_revoked(claims)
+    check = (time.perf_counter() - start) / n * 1e6
+    click.echo(f"  revocation check       {check:8.2f} us/request   {revocations.stats()}")
+
+
+def _percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+@bench_cli.command('login')
+@click.option('--concurrency', default=16, show_default=True)
+@click.option('--requests', 'n', default=200, show_default=True)
+def login(concurrency, n):
+    """
+    Login latency under concurrent load, hashing inline vs in the process pool.
+    A second thread keeps hitting /api/books/available to show how much logins
+    stall unrelated requests. Uses a throw-away user in the configured database.
+    """
+    app = current_app._get_current_object()
+    email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+    password = "bench-password"
+    user = User(name="bench", email=email, password=password_service.hash_password(password), is_verified=True)
+    db.session.add(user)
+    db.session.commit()
+
+    def run(workers):
+        password_service.shutdown_pool()
+        app.config['PASSWORD_HASH_WORKERS'] = workers
+        client = app.test_client()
+        client.post('/api/login', json={"email": email, "password": password})  # warm the pool
+
+        login_ms, probe_ms = [], []
+        done = threading.Event()
+
+        def one_login(_):
+            start = time.perf_counter()
+            resp = app.test_client().post('/api/login', json={"email": email, "password": password})
+            elapsed = (time.perf_counter() - start) * 1000
+            if resp.status_code != 200:
+                raise click.ClickException(f"login returned {resp.status_code}: {resp.get_data(as_text=True)}")
+            login_ms.append(elapsed)
+
+        def probe():
+            probe_client = app.test_client()
+            while not done.is_set():
+                start = time.perf_counter()
+                probe_client.get('/api/books/available?limit=1')
+                probe_ms.append((time.perf_counter() - start) * 1000)
+
+        probe_thread = threading.Thread(target=probe)
+        probe_thread.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(one_login, range(n)))
+        wall = time.perf_counter() - start
+        done.set()
+        probe_thread.join()
+
+        label = f"workers={workers}" if workers else "inline"
+        click.echo(f"{label:<12} {n / wall:7.1f} logins/s   login p50 {_percentile(login_ms, .5):7.1f} ms"
+                   f"   p99 {_percentile(login_ms, .99):7.1f} ms   probe p99 {_percentile(probe_ms, .99):7.1f} ms")
+
+    configured = app.config.get('PASSWORD_HASH_WORKERS') or 2
+    limiter = get_rate_limiter(app)
+    limiter.enabled = False  # all the logins come from one client and one email
+    try:
+        click.echo(f"{n} logins, concurrency {concurrency}, bcrypt cost {app.config.get('BCRYPT_LOG_ROUNDS', 12)}")
+        run(0)
+        run(configured)
+    finally:
+        password_service.shutdown_pool()
+        app.config['PASSWORD_HASH_WORKERS'] = configured
+        limiter.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        db.session.delete(db.session.get(User, user.id))
+        db.session.commit()
+
+
+@bench_cli.command('borrow-race')
+@click.option('--books', 'n_books', default=5, show_default=True, help='Contended titles.')
+@click.option('--users', 'n_users', default=32, show_default=True)
+@click.option('--rounds', default=20, show_default=True, help='Borrow/return rounds per user.')
+@click.option('--threads', default=32, show_default=True)
+@click.option('--copies', default=2, show_default=True, help='Copies of each title.')
+def borrow_race(n_books, n_users, rounds, threads, copies):
+    """
+    Hammer borrow/return for a few books from many threads and verify that no
+    book ever has more open loans than copies. Exits non-zero on an overdraw.
+    Creates (and removes) throw-away users and books in the configured database.
+    """
+    app = current_app._get_current_object()
+    tag = uuid.uuid4().hex[:8]
+    books = [Book(title=f"race-{tag}-{i}", author="bench", total_copies=copies, available_copies=copies,
+                  is_deleted=False) for i in range(n_books)]
+    users = [User(name=f"race-{i}", email=f"race-{tag}-{i}@example.com", password="!", is_verified=True)
+             for i in range(n_users)]
+    db.session.add_all(books + users)
+    db.session.commit()
+    book_ids = [b.id for b in books]
+    user_ids = [u.id for u in users]
+
+    exp = datetime.now(timezone.utc) + timedelta(hours=1)
+    tokens = {
+        u.id: jwt.encode({"id": u.id, "email": u.email, "is_admin": False, "exp": exp},
+                         app.config['SECRET_KEY'], algorithm='HS256')
+        for u in users
+    }
+    outcomes = {}
+    outcomes_lock = threading.Lock()
+
+    def record(kind, status):
+        with outcomes_lock:
+            outcomes[(kind, status)] = outcomes.get((kind, status), 0) + 1
+
+    def worker(index):
+        user_id = user_ids[index % n_users]
+        client = app.test_client()
+        client.set_cookie('token', tokens[user_id])
+        for r in range(rounds):
+            book_id = book_ids[(index + r) % n_books]
+            resp = client.post('/api/borrow', json={"book_id": book_id})
+            record("borrow", resp.status_code)
+            if resp.status_code == 200:
+                borrow_id = db.session.execute(
+                    select(Borrow.id).where(Borrow.user_id == user_id, Borrow.book_id == book_id,
+                                            Borrow.return_date.is_(None))
+                ).scalar()
+                db.session.remove()
+                resp = client.post('/api/borrow/return', json={"borrow_id": borrow_id})
+                record("return", resp.status_code)
+
+    def run_worker(index):
+        with app.app_context():
+            worker(index)
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(run_worker, range(n_users)))
+        wall = time.perf_counter() - start
+
+        # Never more open loans than copies, and the shelf counter must account
+        # for every copy that isn't on loan.
+        open_loans = dict(db.session.execute(
+            select(Borrow.book_id, func.count())
+            .where(Borrow.book_id.in_(book_ids), Borrow.status.in_(BorrowStatus.OPEN))
+            .group_by(Borrow.book_id)
+        ).all())
+        on_shelf = dict(db.session.execute(
+            select(Book.id, Book.available_copies).where(Book.id.in_(book_ids))
+        ).all())
+        violations = [
+            book_id for book_id in book_ids
+            if open_loans.get(book_id, 0) > copies or on_shelf[book_id] != copies - open_loans.get(book_id, 0)
+        ]
+
+        total = sum(outcomes.values())
+        click.echo(f"{total} requests in {wall:.1f}s ({total / wall:.0f} req/s), {threads} threads")
+        for (kind, status), count in sorted(outcomes.items()):
+            click.echo(f"  {kind:<7} {status}: {count}")
+        if violations:
+            raise click.ClickException(f"More loans than copies / inconsistent counters on books {violations}")
+        click.echo("No copy was lent twice.")
+    finally:
+        db.session.rollback()
+        db.session.execute(Borrow.__table__.delete().where(Borrow.book_id.in_(book_ids)))
+        db.session.execute(Book.__table__.delete().where(Book.id.in_(book_ids)))
+        db.session.execute(User.__table__.delete().where(User.id.in_(user_ids)))
+        db.session.commit()
+
+
+@contextmanager
+def _seeded_app(database_url, books, users, borrows, seed):
+    """A fresh app on a scratch database filled by the seed generator."""
+    from app import create_app
+
+    temp_path = None
+    if database_url is None:
+        database_url, temp_path = route_bench.scratch_sqlite_url()
+    elif not click.confirm(f"Every table in {database_url} will be dropped. Continue?"):
+        raise click.Abort()
+
+    app = create_app(route_bench.bench_config(database_url))
+    try:
+        with app.app_context():
+            route_bench.prepare_database()
+            start = time.perf_counter()
+            route_bench.seed_bench_data(books, users, borrows, seed=seed)
+            click.echo(f"Seeded {books} books, {users} users, {borrows} borrows in {time.perf_counter() - start:.1f}s "
+                       f"({db.engine.dialect.name})")
+            yield app
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        if temp_path:
+            os.remove(temp_path)
+
+
+@bench_cli.command('routes')
+@click.option('--database-url', default=None,
+              help='Scratch database to use (ALL TABLES ARE DROPPED). Defaults to a temporary SQLite file.')
+@click.option('--books', default=10000, show_default=True)
+@click.option('--users', default=1000, show_default=True)
+@click.option('--borrows', default=10000, show_default=True)
+@click.option('--runs', default=20, show_default=True, help='Timed requests per route.')
+@click.option('--only', multiple=True, help='Only routes whose name starts with this prefix.')
+@click.option('--baseline', 'baseline_path', default='benchmarks/routes_baseline.json', show_default=True)
+@click.option('--update-baseline', is_flag=True, help='Save this run as the new baseline.')
+@click.option('--threshold', default=0.25, show_default=True, help='Allowed p50 slowdown vs the baseline.')
+@click.option('--seed', default=1234, show_default=True)
+def routes(database_url, books, users, borrows, runs, only, baseline_path, update_baseline, threshold, seed):
+    """Latency and query count for every route, against a freshly seeded database."""
+    with _seeded_app(database_url, books, users, borrows, seed) as app:
+        results = route_bench.run_suite(app, runs, only=only)
+        dialect = db.engine.dialect.name
+
+    baseline = route_bench.load_baseline(baseline_path)
+    base_routes = baseline["routes"] if baseline else {}
+    click.echo(f"\n{'route':<28}{'p50 ms':>10}{'p95 ms':>10}{'queries':>9}{'base p50':>10}")
+    for name, r in results.items():
+        base = base_routes.get(name, {})
+        base_p50 = f"{base['p50']:.2f}" if base else "-"
+        click.echo(f"{name:<28}{r['p50']:>10.2f}{r['p95']:>10.2f}{r['queries']:>9}{base_p50:>10}")
+
+    if update_baseline:
+        meta = {"books": books, "users": users, "borrows": borrows, "runs": runs,
+                "dialect": dialect, "created": datetime.now(timezone.utc).isoformat()}
+        route_bench.save_baseline(baseline_path, results, meta)
+        click.echo(f"\nBaseline written to {baseline_path}")
+        return
+
+    regressions = route_bench.compare(results, base_routes, threshold)
+    if regressions:
+        click.echo("\nRegressions:")
+        for line in regressions:
+            click.echo(f"  {line}")
+        raise SystemExit(1)
+    click.echo("\nNo regressions." if baseline else "\nNo baseline to compare against (use --update-baseline).")
+
+
+@bench_cli.command('queries')
+@click.option('--database-url', default=None,
+              help='Scratch database to use (ALL TABLES ARE DROPPED). Defaults to a temporary SQLite file.')
+@click.option('--page-size', 'page_sizes', multiple=True, type=int, default=[5, 50], show_default=True)
+@click.option('--seed', default=1234, show_default=True)
+def queries(database_url, page_sizes, seed):
+    """Fail if a list endpoint issues more SQL statements for bigger pages (N+1 check)."""
+    if len(set(page_sizes)) < 2:
+        raise click.BadParameter("give at least two different --page-size values")
+    sizes = sorted(set(page_sizes))
+    with _seeded_app(database_url, max(sizes) * 20, max(sizes) * 4, max(sizes) * 40, seed) as app:
+        results = route_bench.query_counts(app, sizes)
+
+    click.echo(f"\n{'route':<28}" + "".join(f"{f'limit={n}':>10}" for n in sizes))
+    failures = []
+    for name, counts in results.items():
+        click.echo(f"{name:<28}" + "".join(f"{counts[n]:>10}" for n in sizes))
+        if len(set(counts.values())) > 1:
+            failures.append(name)
+
+    if failures:
+        click.echo(f"\nStatement count grows with page size: {', '.join(failures)}")
+        raise SystemExit(1)
+    click.echo("\nStatement counts are independent of page size.")
+
+
+@bench_cli.command('replica')
+@click.option('--seed', default=1234, show_default=True)
+def replica(seed):
+    """
+    Check read-replica routing on two scratch SQLite files: list endpoints must
+    read from the replica, and from the primary right after the client wrote.
+    Cached routes (route_bench.PRIMARY_ONLY) must never read from the replica.
+    """
+    from app import create_app
+
+    primary_url, primary_path = route_bench.scratch_sqlite_url()
+    replica_url, replica_path = route_bench.scratch_sqlite_url()
+    config = route_bench.bench_config(primary_url)
+    config["SQLALCHEMY_BINDS"] = {"replica": replica_url}
+    app = create_app(config)
+    try:
+        with app.app_context():
+            route_bench.prepare_database()
+            route_bench.seed_bench_data(500, 50, 1000, seed=seed)
+            ctx = route_bench.BenchContext(app, 10)
+            # "Replicate": the replica starts as a byte copy of the primary
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+            shutil.copyfile(primary_path, replica_path)
+
+            results = route_bench.replica_routing(app, ctx)
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+    finally:
+        os.remove(primary_path)
+        os.remove(replica_path)
+
+    click.echo(f"\n{'route':<26}{'fresh p/r':>12}{'after write p/r':>18}")
+    failures = []
+    for scenario in route_bench.PAGED_SCENARIOS:
+        fresh = results[(scenario.name, "fresh")]
+        sticky = results[(scenario.name, "after_write")]
+        click.echo(f"{scenario.name:<26}{f'{fresh[0]}/{fresh[1]}':>12}{f'{sticky[0]}/{sticky[1]}':>18}")
+        if scenario.name in route_bench.PRIMARY_ONLY:
+            misrouted = fresh[1] or sticky[1]
+        else:
+            misrouted = fresh[0] or not fresh[1] or sticky[1] or not sticky[0]
+        if misrouted:
+            failures.append(scenario.name)
+
+    if failures:
+        click.echo(f"\nMisrouted: {', '.join(failures)}")
+        raise SystemExit(1)
+    click.echo("\nReads go to the replica, and to the primary right after a write "
+               f"({', '.join(sorted(route_bench.PRIMARY_ONLY))}: always the primary).")
+
+
+@bench_cli.command('startup')
+@click.option('--runs', default=5, show_default=True, help='Cold starts to time.')
+@click.option('--path', default='/api/books/available', show_default=True, help='The first request.')
+@click.option('--top', default=15, show_default=True, help='Packages to list by import time.')
+@click.option('--budget-ms', type=float, default=None, help='Fail if the median time to first request is higher.')
+def startup(runs, path, top, budget_ms):
+    """Time to first request of a fresh interpreter, with an import-time breakdown."""
+    database_url, temp_path = route_bench.scratch_sqlite_url()
+    try:
+        startup_bench.prepare_schema(database_url)
+        samples = [startup_bench.cold_start(current_app.root_path, database_url, path)[0] for _ in range(runs)]
+        traced, stderr = startup_bench.cold_start(current_app.root_path, database_url, path, importtime=True)
+    finally:
+        os.remove(temp_path)
+
+    rows = startup_bench.parse_importtime(stderr)
+    click.echo(f"{'package':<28}{'self ms':>10}")
+    for package, ms in startup_bench.import_cost_by_package(rows, top):
+        click.echo(f"{package:<28}{ms:>10.1f}")
+    click.echo(f"{len(rows)} modules imported, first request {path} -> {traced['status']}\n")
+
+    median = startup_bench.summarize(samples)
+    for phase in ("import", "create_app", "first_request", "total"):
+        click.echo(f"{phase:<16}{median[phase]:>10.1f} ms")
+
+    failures = []
+    if traced["cli_only"]:
+        failures.append(f"web boot imports CLI-only modules: {', '.join(traced['cli_only'])}")
+    if budget_ms is not None and median["total"] > budget_ms:
+        failures.append(f"time to first request {median['total']:.1f} ms is over the {budget_ms:.0f} ms budget")
+    if failures:
+        click.echo("\n" + "\n".join(failures))
+        raise SystemExit(1)
+
+
+class _Sink(io.TextIOBase):
+    """Discards log lines; `latency` simulates a stdout pipe that cannot keep up."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.lines = 0
+
+    def write(self, text):
+        if self.latency:
+            time.sleep(self.latency)
+        self.lines += 1
+        return len(text)
+
+
+def _logging_modes(sink):
+    direct = logging.StreamHandler(sink)
+    direct.setFormatter(logging_pipeline.JsonFormatter())
+    queued = logging_pipeline.LoggingPipeline(stream=sink)
+    sampled = logging_pipeline.LoggingPipeline(stream=sink, sample_rates={"bench": 0.1})
+    return {"direct": (direct, None), "queue": (queued.handler, queued), "queue 10%": (sampled.handler, sampled)}
+
+
+@bench_cli.command('logging')
+@click.option('-n', default=20000, show_default=True, help='Log calls per mode.')
+@click.option('--write-latency-us', default=0, show_default=True,
+              help='Delay per written line, to simulate a slow or blocked stdout.')
+@click.option('--requests', 'n_requests', default=2000, show_default=True, help='Requests per access-log mode.')
+def logging_bench(n, write_latency_us, n_requests):
+    """Cost of a log call on the request thread: direct JSON writes vs the queue pipeline."""
+    from app import create_app
+
+    latency = write_latency_us / 1e6
+    click.echo(f"{n} calls per mode, {write_latency_us} us per written line")
+    click.echo(f"{'mode':<14}{'p50 us':>10}{'p99 us':>10}{'max us':>10}{'written':>10}{'dropped':>10}")
+    for mode, (handler, pipeline) in _logging_modes(sink := _Sink(latency)).items():
+        sink.lines = 0
+        logger = logging.getLogger(f"bench.{mode}")
+        logger.handlers[:] = [handler]
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        if pipeline:
+            pipeline.start()
+        samples = []
+        for i in range(n):
+            start = time.perf_counter()
+            logger.info("GET /api/books/%s 200", i, extra={"route": "/api/books/<int:book_id>", "status": 200,
+                                                           "token": "eyJhbGciOi.eyJzdWIiOi.c2lnbmF0dXJl"})
+            samples.append((time.perf_counter() - start) * 1e6)
+        if pipeline:
+            pipeline.stop()
+        dropped = pipeline.dropped if pipeline else 0
+        click.echo(f"{mode:<14}{_percentile(samples, 0.5):>10.1f}{_percentile(samples, 0.99):>10.1f}"
+                   f"{max(samples):>10.1f}{sink.lines:>10}{dropped:>10}")
+
+    # Whole requests through the test client, with the app's real pipeline writing to the sink
+    click.echo(f"\n{n_requests} requests to /api/books/available per access-log mode")
+    click.echo(f"{'access log':<14}{'p50 us':>10}{'p99 us':>10}")
+    database_url, temp_path = route_bench.scratch_sqlite_url()
+    try:
+        for label, enabled, rates in (("off", False, ""), ("100%", True, "app.access=1"), ("10%", True, "app.access=0.1")):
+            config = route_bench.bench_config(database_url)
+            config.update(ACCESS_LOG_ENABLED=enabled, LOG_SAMPLE_RATES=rates)
+            app = create_app(config)
+            pipeline = logging_pipeline.get_pipeline()
+            previous = pipeline.output.setStream(_Sink(latency))
+            try:
+                with app.app_context():
+                    route_bench.prepare_database()
+                    client = app.test_client()
+                    client.get('/api/books/available')  # warm-up
+                    samples = []
+                    for _ in range(n_requests):
+                        start = time.perf_counter()
+                        client.get('/api/books/available')
+                        samples.append((time.perf_counter() - start) * 1e6)
+                    db.session.remove()
+                    db.engine.dispose()
+                pipeline.queue.join()
+            finally:
+                pipeline.output.setStream(previous)
+            click.echo(f"{label:<14}{_percentile(samples, 0.5):>10.1f}{_percentile(samples, 0.99):>10.1f}")
+    finally:
+        os.remove(temp_path)
+
+
+def _borrow_rows(n):
+    """Rows shaped like the get_borrow_records projection, without a database."""
+    start = datetime(2026, 1, 1, 9, 30)
+    return [SimpleNamespace(
+        id=i, user_id=i % 500 or None, user_is_deleted=False, user_name=f"Reader {i % 500}",
+        user_email=f"reader{i % 500}@example.com", borrow_user_name=None, borrow_user_email=None,
+        book_id=i % 2000, book_title=f"A Book Title Number {i}", book_author="Some Author",
+        borrow_date=start + timedelta(minutes=i), due_date=(start + timedelta(days=14, minutes=i)).date(),
+        return_date=None if i % 3 else (start + timedelta(days=7)).date(),
+        status=BorrowStatus.RETURNED if i % 3 == 0 else BorrowStatus.NOT_RETURNED,
+    ) for i in range(n)]
+
+
+@bench_cli.command('serialize')
+@click.option('--page-size', 'page_sizes', multiple=True, type=int, default=[100, 1000, 10000], show_default=True)
+@click.option('--runs', default=10, show_default=True)
+def serialize(page_sizes, runs):
+    """Build and encode borrow-record pages: Flask's default encoder vs the app's provider."""
+    from flask.json.provider import DefaultJSONProvider
+
+    app = current_app._get_current_object()
+    flask_default = DefaultJSONProvider(app)
+    encoders = {"flask json": lambda page: flask_default.dumps(page).encode(),
+                "stdlib": json_provider.stdlib_dumps_bytes}
+    if json_provider.orjson_dumps_bytes is not None:
+        encoders["orjson"] = json_provider.orjson_dumps_bytes
+    else:
+        click.echo("orjson is not installed; the app uses the stdlib encoder")
+
+    for size in page_sizes:
+        rows = _borrow_rows(size)
+        build = _time_runs(lambda: {"records": [serializers.borrow_record_to_dict(r) for r in rows]}, runs)
+        page = {"records": [serializers.borrow_record_to_dict(r) for r in rows]}
+        click.echo(f"\n{size} records ({len(json_provider.dumps_bytes(page)) / 1024:.0f} KiB)")
+        _report("to dicts", build)
+        for name, encode in encoders.items():
+            _report(name, _time_runs(lambda: encode(page), runs))
+
+
+def _book_page_loaders():
+    def page(query, n):
+        return query.filter(Book.is_deleted == False).order_by(Book.title, Book.id).limit(n)
+
+    columns = [getattr(Book, field) for field in serializers.BOOK_FIELDS]
+    return {
+        "orm entities": lambda n: [serializers.book_to_dict(b) for b in page(Book.query, n)],
+        "row tuples": lambda n: [r._asdict() for r in page(db.session.query(*columns), n)],
+        "summaries": lambda n: [b._asdict() for b in page(read_models.book_summaries(), n)],
+    }
+
+
+@bench_cli.command('read-models')
+@click.option('--database-url', default=None,
+              help='Scratch database to use (ALL TABLES ARE DROPPED). Defaults to a temporary SQLite file.')
+@click.option('--page-size', 'page_sizes', multiple=True, type=int, default=[100, 1000, 5000], show_default=True)
+@click.option('--runs', default=20, show_default=True)
+@click.option('--seed', default=1234, show_default=True)
+def read_models_bench(database_url, page_sizes, runs, seed):
+    """Time and memory per page of books: ORM entities vs column rows vs read-model summaries."""
+    books = max(page_sizes)
+    with _seeded_app(database_url, books, 10, 10, seed):
+        loaders = _book_page_loaders()
+        click.echo(f"{'loader':<14}{'rows':>7}{'p50 ms':>10}{'us/row':>9}{'peak KiB':>10}{'B/row':>8}")
+        for size in page_sizes:
+            for name, load in loaders.items():
+                def run():
+                    load(size)
+                    db.session.remove()
+                stats = _time_runs(run, runs)
+                tracemalloc.start()
+                load(size)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                db.session.remove()
+                click.echo(f"{name:<14}{size:>7}{stats['p50']:>10.2f}{stats['p50'] * 1000 / size:>9.2f}"
+                           f"{peak / 1024:>10.0f}{peak // size:>8}")
+
+
+# (label, extra query parameters, count cache on)
+COUNT_MODES = (
+    ("recount", {}, False),
+    ("cached", {}, True),
+    ("estimate", {"count": "estimate"}, True),
+    ("no total", {"include_total": "false"}, True),
+)
+
+
+@bench_cli.command('counts')
+@click.option('--database-url', default=None,
+              help='Scratch database to use (ALL TABLES ARE DROPPED). Defaults to a temporary SQLite file.')
+@click.option('--books', default=50000, show_default=True)
+@click.option('--users', default=5000, show_default=True)
+@click.option('--borrows', default=50000, show_default=True)
+@click.option('--pages', default=10, show_default=True, help='Pages flipped per list and mode.')
+@click.option('--seed', default=1234, show_default=True)
+def counts_bench(database_url, books, users, borrows, pages, seed):
+    """Flip through filtered admin lists: count every page vs cached totals vs estimates vs no total."""
+    lists = {
+        "books": "/api/books?search_query=the&search_by=title&filter_status=not_deleted",
+        "borrow records": "/api/borrow/records?searchQuery=a&searchBy=book",
+        "users": "/api/admin/user?search=a",
+    }
+    with _seeded_app(database_url, books, users, borrows, seed) as app:
+        ctx = route_bench.BenchContext(app, 1)
+        client = app.test_client()
+        client.set_cookie('token', ctx.tokens["admin"])
+        cache = get_count_cache(app)
+        ttl = cache.ttl
+
+        click.echo(f"{'list':<16}{'mode':<10}{'ms/page':>9}{'SQL/page':>10}   first page")
+        try:
+            for name, url in lists.items():
+                client.get(f"{url}&page=1&limit=10")  # warm-up: search index probe, revocation list
+                for label, params, cached in COUNT_MODES:
+                    cache.invalidate()
+                    cache.ttl = ttl if cached else 0
+                    extra = "".join(f"&{k}={v}" for k, v in params.items())
+                    start = time.perf_counter()
+                    with count_queries(db.engine) as counter:
+                        for page in range(1, pages + 1):
+                            response = client.get(f"{url}&page={page}&limit=10{extra}")
+                            if page == 1:
+                                first = {k: v for k, v in response.get_json().items() if not isinstance(v, list)}
+                    elapsed = (time.perf_counter() - start) * 1000 / pages
+                    click.echo(f"{name:<16}{label:<10}{elapsed:>9.2f}{counter.count / pages:>10.1f}   {first}")
+        finally:
+            cache.ttl = ttl
@@ -0,0 +1,21 @@
+import time
+import click
+from flask.cli import AppGroup
+from services.borrow_service import sweep_overdue
+
+borrows_cli = AppGroup('borrows', help='Loan maintenance jobs.')
+
+
+@borrows_cli.command('sweep-overdue')
+@click.option('--batch-size', default=1000, show_default=True)
+@click.option('--no-mail', is_flag=True, help='Update statuses without sending reminders.')
+@click.option('--interval', default=0, show_default=True,
+              help='Seconds between sweeps. 0 runs once, suitable for cron.')
+def sweep_overdue_command(batch_size, no_mail, interval):
+    """Mark open loans past their due date as Overdue and mail the borrowers."""
+    while True:
+        count = sweep_overdue(batch_size=batch_size, notify=not no_mail)
+        click.echo(f"Marked {count} loan(s) overdue.")
+        if not interval:
+            break
+        time.sleep(interval)
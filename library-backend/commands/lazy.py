@@ -0,0 +1,24 @@
+"""
+Lazily imported CLI commands.
+
+The command modules pull in the seeder, the benchmarks and their helpers,
+which a web worker never needs. The app only records where each command
+lives; the module is imported the first time `flask` looks the command up.
+"""
+from importlib import import_module
+from flask.cli import AppGroup
+
+
+class LazyAppGroup(AppGroup):
+    def __init__(self, lazy_commands, **kwargs):
+        super().__init__(**kwargs)
+        self.lazy_commands = dict(lazy_commands)
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, name):
+        if name not in self.commands and name in self.lazy_commands:
+            module, attr = self.lazy_commands[name].split(':')
+            self.add_command(getattr(import_module(module), attr), name)
+        return super().get_command(ctx, name)
@@ -0,0 +1,53 @@
+import time
+import click
+from flask.cli import AppGroup
+from services.outbox_service import drain_outbox, requeue_dead
+from utils.fake_smtp import FakeSMTPServer
+
+outbox_cli = AppGroup('outbox', help='Outgoing email queue.')
+
+
+@outbox_cli.command('work')
+@click.option('--batch-size', type=int, default=None, help='Defaults to OUTBOX_BATCH_SIZE.')
+@click.option('--interval', default=2.0, show_default=True, help='Seconds to sleep when the outbox is empty.')
+@click.option('--once', is_flag=True, help='Drain what is due now and exit.')
+def work(batch_size, interval, once):
+    """Send queued emails in batches over a reused SMTP connection."""
+    while True:
+        sent, failed = drain_outbox(batch_size=batch_size)
+        if sent or failed:
+            click.echo(f"Sent {sent}, failed {failed}.")
+        elif once:
+            break
+        else:
+            time.sleep(interval)
+
+
+@outbox_cli.command('requeue-dead')
+def requeue_dead_command():
+    """Retry every dead-lettered email."""
+    click.echo(f"Requeued {requeue_dead()} email(s).")
+
+
+@outbox_cli.command('fake-smtp')
+@click.option('--host', default='127.0.0.1', show_default=True)
+@click.option('--port', default=1025, show_default=True)
+@click.option('--maildir', default=None, help='Also write each message to this directory as .eml.')
+def fake_smtp(host, port, maildir):
+    """Run a local SMTP sink that accepts and prints every message."""
+    server = FakeSMTPServer(host, port, maildir=maildir)
+    deliver = server.deliver
+
+    def echo_deliver(mail_from, rcpt_to, data):
+        deliver(mail_from, rcpt_to, data)
+        subject = server.messages[-1]["message"]["Subject"]
+        click.echo(f"{mail_from} -> {', '.join(rcpt_to)}: {subject}")
+
+    server.deliver = echo_deliver
+    click.echo(f"Fake SMTP listening on {host}:{server.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,316 @@
+"""
+⏱️ Endpoint benchmark suite.
+
+Builds a fresh app with create_app() against a scratch database, seeds it,
+then drives every route through the Flask test client, recording latency and
+the number of SQL statements per request. Results can be saved as a baseline
+and later runs fail when a route gets slower (or issues more queries) than
+the baseline allows.
+"""
+import json
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+import jwt
+from sqlalchemy import select
+from extensions import db
+from models import User, Book, Borrow, BorrowStatus
+from commands.seed import seed_database
+from services.password_service import hash_password
+from services.search_service import create_search_index
+from utils.query_counter import count_queries
+
+BENCH_PASSWORD = "bench-password"
+
+# Absolute slack so sub-millisecond routes don't fail on timer noise
+NOISE_FLOOR_MS = 1.0
+
+Scenario = namedtuple('Scenario', 'name method auth url body')
+
+
+def bench_config(database_url):
+    return {
+        "SQLALCHEMY_DATABASE_URI": database_url,
+        "TESTING": True,
+        # Cheap hashes and inline hashing: this measures route overhead, not bcrypt
+        "BCRYPT_LOG_ROUNDS": 4,
+        "PASSWORD_HASH_WORKERS": 0,
+        "MAIL_SUPPRESS_SEND": True,
+        # Every scenario comes from one client; limits would turn the auth routes into 429s
+        "RATE_LIMIT_ENABLED": False,
+        # Load the revocation log once, so per-route query counts don't depend on when it refreshes
+        "REVOCATION_REFRESH_SECONDS": 3600,
+    }
+
+
+def seed_bench_data(books, users, borrows, seed=1234, chunk=5000):
+    """Fill the scratch database with the same generator `flask seed` uses."""
+    seed_database(users, books, borrows, seed=seed, chunk_size=chunk, password=BENCH_PASSWORD)
+
+
+class BenchContext:
+    """Ids and throw-away rows the scenarios need, created before timing starts."""
+
+    def __init__(self, app, runs):
+        self.tag = uuid.uuid4().hex[:8]
+        n = runs + 1
+
+        self.admin = User(name="bench admin", email=f"admin-{self.tag}@bench.local",
+                          password=hash_password(BENCH_PASSWORD), is_verified=True, is_admin=True)
+        self.member = User(name="bench member", email=f"member-{self.tag}@bench.local",
+                           password=hash_password(BENCH_PASSWORD), is_verified=True)
+        self.unverified = User(name="bench unverified", email=f"unverified-{self.tag}@bench.local",
+                               password=hash_password(BENCH_PASSWORD), is_verified=False)
+        doomed = [User(name=f"doomed {i}", email=f"doomed-{i}-{self.tag}@bench.local", password="!")
+                  for i in range(n)]
+        free_books = [Book(title=f"free {i} {self.tag}", author="bench", total_copies=1, available_copies=1,
+                           is_deleted=False)
+                      for i in range(n)]
+        loaned_books = [Book(title=f"loaned {i} {self.tag}", author="bench", total_copies=1, available_copies=0,
+                             is_deleted=False)
+                        for i in range(n)]
+        db.session.add_all([self.admin, self.member, self.unverified] + doomed + free_books + loaned_books)
+        db.session.commit()
+
+        loans = [Borrow(user_id=self.member.id, book_id=b.id, borrow_date=datetime.now(timezone.utc),
+                        due_date=datetime.now(timezone.utc).date() + timedelta(days=14),
+                        status=BorrowStatus.NOT_RETURNED, is_deleted=False)
+                 for b in loaned_books]
+        db.session.add_all(loans)
+        db.session.commit()
+
+        self.doomed_ids = [u.id for u in doomed]
+        self.free_book_ids = [b.id for b in free_books]
+        self.loan_ids = [loan.id for loan in loans]
+        self.admin_id, self.member_id = self.admin.id, self.member.id
+        self.member_email, self.unverified_email = self.member.email, self.unverified.email
+
+        exp = datetime.now(timezone.utc) + timedelta(hours=2)
+        secret = app.config['SECRET_KEY']
+        self.tokens = {
+            "admin": jwt.encode({"id": self.admin_id, "email": self.admin.email, "is_admin": True, "exp": exp},
+                                secret, algorithm='HS256'),
+            "user": jwt.encode({"id": self.member_id, "email": self.member_email, "is_admin": False, "exp": exp},
+                               secret, algorithm='HS256'),
+        }
+        self.sample_book_id = db.session.execute(
+            select(Book.id).where(Book.is_deleted == False).order_by(Book.id)
+        ).scalar()
+
+
+def scenarios(ctx):
+    bulk_csv = "title,author\n" + "".join(f"bulk {i},bench\n" for i in range(100))
+    return [
+        # routes/auth.py
+        Scenario("auth.protected", "GET", "user", lambda i: "/api/protected", None),
+        Scenario("auth.login", "POST", None, lambda i: "/api/login",
+                 lambda i: {"email": ctx.member_email, "password": BENCH_PASSWORD}),
+        Scenario("auth.register", "POST", None, lambda i: "/api/register",
+                 lambda i: {"name": "new", "email": f"reg-{i}-{ctx.tag}@bench.local", "password": "pw"}),
+        Scenario("auth.forgot_password", "POST", None, lambda i: "/api/forgot-password",
+                 lambda i: {"email": ctx.member_email}),
+        Scenario("auth.resend_verification", "POST", None, lambda i: "/api/resend-verification",
+                 lambda i: {"email": ctx.unverified_email}),
+        Scenario("auth.reset_password", "POST", None, lambda i: "/api/reset-password",
+                 lambda i: {"token": "not-a-token", "password": "pw"}),
+        Scenario("auth.verify_email", "GET", None, lambda i: "/api/verify-email?token=not-a-token", None),
+        # routes/userroutes.py
+        Scenario("user.profile", "GET", "user", lambda i: "/api/user/profile", None),
+        # routes/books.py
+        Scenario("books.list", "GET", "admin", lambda i: "/api/books?page=1&limit=10", None),
+        Scenario("books.list.deep", "GET", "admin", lambda i: "/api/books?page=200&limit=10", None),
+        Scenario("books.list.cursor", "GET", "admin", lambda i: "/api/books?limit=10&cursor=", None),
+        Scenario("books.list.search", "GET", "admin",
+                 lambda i: "/api/books?search_query=river&search_by=title&limit=10", None),
+        Scenario("books.available", "GET", None, lambda i: "/api/books/available?page=1&limit=10", None),
+        Scenario("books.available.uncached", "GET", None,
+                 lambda i: f"/api/books/available?page=1&limit=10&run={i}", None),
+        Scenario("books.available.search", "GET", None,
+                 lambda i: f"/api/books/available?searchQuery=stone&searchBy=title&limit=10&run={i}", None),
+        Scenario("books.add", "POST", "admin", lambda i: "/api/books",
+                 lambda i: {"title": f"added {i}", "author": "bench"}),
+        Scenario("books.update", "PUT", "admin", lambda i: f"/api/books/{ctx.sample_book_id}",
+                 lambda i: {"title": f"renamed {i}"}),
+        Scenario("books.delete", "DELETE", "admin", lambda i: f"/api/books/delete/{ctx.sample_book_id}", None),
+        Scenario("books.restore", "PUT", "admin", lambda i: f"/api/books/restore/{ctx.sample_book_id}", None),
+        Scenario("books.bulk", "POST", "admin", lambda i: "/api/books/bulk?format=csv", lambda i: bulk_csv),
+        Scenario("books.export", "GET", "admin",
+                 lambda i: "/api/books/export?search_query=bulk&search_by=title", None),
+        Scenario("borrow.borrow", "POST", "user", lambda i: "/api/borrow",
+                 lambda i: {"book_id": ctx.free_book_ids[i]}),
+        Scenario("borrow.return", "POST", "user", lambda i: "/api/borrow/return",
+                 lambda i: {"borrow_id": ctx.loan_ids[i]}),
+        Scenario("borrow.records", "GET", "admin", lambda i: "/api/borrow/records?page=1&limit=10", None),
+        Scenario("borrow.records.overdue", "GET", "admin",
+                 lambda i: "/api/borrow/records?returnStatus=overdue&page=1&limit=10", None),
+        Scenario("borrow.records.borrower", "GET", "admin",
+                 lambda i: "/api/borrow/records?searchBy=borrower&searchQuery=member&limit=10", None),
+        Scenario("borrow.history", "GET", "user", lambda i: "/api/borrow/history?page=1&limit=10", None),
+        Scenario("borrow.export", "GET", "admin",
+                 lambda i: "/api/borrow/records/export?searchBy=book&searchQuery=loaned", None),
+        # routes/usermanagement.py
+        Scenario("admin.users", "GET", "admin", lambda i: "/api/admin/user?page=1&limit=10", None),
+        Scenario("admin.users.search", "GET", "admin",
+                 lambda i: "/api/admin/user?search=priya&searchBy=name&limit=10", None),
+        Scenario("admin.user.update", "PUT", "admin", lambda i: f"/api/admin/user/{ctx.member_id}",
+                 lambda i: {"name": f"bench member {i}"}),
+        Scenario("admin.user.add", "POST", "admin", lambda i: "/api/admin/user",
+                 lambda i: {"name": "added", "email": f"added-{i}-{ctx.tag}@bench.local", "password": "pw"}),
+        Scenario("admin.user.delete", "DELETE", "admin", lambda i: f"/api/admin/user/{ctx.doomed_ids[i]}", None),
+    ]
+
+
+# List endpoints whose statement count must not depend on the page size.
+# `url` takes the page size; `run` busts the catalog cache so the query runs.
+PAGED_SCENARIOS = [
+    Scenario("books.list", "GET", "admin", lambda n: f"/api/books?page=1&limit={n}", None),
+    Scenario("books.list.cursor", "GET", "admin", lambda n: f"/api/books?limit={n}&cursor=", None),
+    Scenario("books.list.search", "GET", "admin",
+             lambda n: f"/api/books?search_query=river&search_by=title&limit={n}", None),
+    Scenario("books.available", "GET", None, lambda n: f"/api/books/available?page=1&limit={n}&run={n}", None),
+    Scenario("borrow.records", "GET", "admin", lambda n: f"/api/borrow/records?page=1&limit={n}", None),
+    Scenario("borrow.records.cursor", "GET", "admin", lambda n: f"/api/borrow/records?limit={n}&cursor=", None),
+    Scenario("borrow.history", "GET", "user", lambda n: f"/api/borrow/history?page=1&limit={n}", None),
+    Scenario("borrow.history.cursor", "GET", "user", lambda n: f"/api/borrow/history?limit={n}&cursor=", None),
+    Scenario("admin.users", "GET", "admin", lambda n: f"/api/admin/user?page=1&limit={n}", None),
+    Scenario("admin.users.cursor", "GET", "admin", lambda n: f"/api/admin/user?limit={n}&cursor=", None),
+]
+
+# Cached routes that deliberately fill their cache from the primary
+PRIMARY_ONLY = {"books.available"}
+
+
+def query_counts(app, page_sizes):
+    """Statements per request for every PAGED_SCENARIOS entry at each page size."""
+    # One loan per run: the bench member needs at least a full page of history
+    ctx = BenchContext(app, max(page_sizes))
+    client = app.test_client()
+    results = {}
+    for scenario in PAGED_SCENARIOS:
+        counts = {}
+        _send(client, ctx, scenario, 1)  # warm-up: one-off probes (search index, caches) don't count
+        for size in page_sizes:
+            with count_queries(db.engine) as counter:
+                response = _send(client, ctx, scenario, size)
+            if response.status_code != 200:
+                raise RuntimeError(f"{scenario.name}: HTTP {response.status_code}")
+            counts[size] = counter.count
+        results[scenario.name] = counts
+    return results
+
+
+def replica_routing(app, ctx):
+    """
+    For every PAGED_SCENARIOS read: (primary statements, replica statements),
+    first as a fresh client and then right after that client made a write.
+    """
+    primary, replica = db.engines[None], db.engines['replica']
+    client = app.test_client()
+    for scenario in PAGED_SCENARIOS:
+        _send(client, ctx, scenario, 1)  # warm-up: one-off probes (search index) hit the primary
+    results = {}
+    for phase in ("fresh", "after_write"):
+        if phase == "after_write":
+            client.set_cookie('token', ctx.tokens["admin"])
+            client.post('/api/books', json={"title": f"sticky {ctx.tag}", "author": "bench"})
+        for scenario in PAGED_SCENARIOS:
+            with count_queries(primary) as on_primary, count_queries(replica) as on_replica:
+                response = _send(client, ctx, scenario, 10)
+            if response.status_code != 200:
+                raise RuntimeError(f"{scenario.name}: HTTP {response.status_code}")
+            results[(scenario.name, phase)] = (on_primary.count, on_replica.count)
+    return results
+
+
+def _send(client, ctx, scenario, i):
+    if scenario.auth:
+        client.set_cookie('token', ctx.tokens[scenario.auth])
+    else:
+        client.delete_cookie('token')
+    kwargs = {}
+    if scenario.body is not None:
+        body = scenario.body(i)
+        if isinstance(body, str):
+            kwargs = {"data": body, "content_type": "text/csv"}
+        else:
+            kwargs = {"json": body}
+    response = client.open(scenario.url(i), method=scenario.method, **kwargs)
+    response.get_data()  # drain streamed responses inside the timing
+    return response
+
+
+def run_suite(app, runs, only=None):
+    """Run every scenario `runs` times; returns {name: {p50, p95, mean, queries, errors}}."""
+    ctx = BenchContext(app, runs)
+    client = app.test_client()
+    results = {}
+
+    for scenario in scenarios(ctx):
+        if only and not any(scenario.name.startswith(prefix) for prefix in only):
+            continue
+        _send(client, ctx, scenario, 0)  # warm-up (also warms caches on purpose)
+        timings, queries, errors = [], [], 0
+        for i in range(1, runs + 1):
+            with count_queries(db.engine) as counter:
+                start = time.perf_counter()
+                response = _send(client, ctx, scenario, i)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(counter.count)
+            if response.status_code >= 500:
+                errors += 1
+        timings.sort()
+        results[scenario.name] = {
+            "p50": round(timings[len(timings) // 2], 3),
+            "p95": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+            "mean": round(statistics.fmean(timings), 3),
+            "queries": int(statistics.median(queries)),
+            "errors": errors,
+        }
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return a list of human readable regressions against `baseline`."""
+    regressions = []
+    for name, current in results.items():
+        if current["errors"]:
+            regressions.append(f"{name}: {current['errors']} server error(s)")
+        base = baseline.get(name)
+        if not base:
+            continue
+        limit = base["p50"] * (1 + threshold)
+        if current["p50"] > limit and current["p50"] - base["p50"] > NOISE_FLOOR_MS:
+            regressions.append(f"{name}: p50 {current['p50']:.2f} ms > {base['p50']:.2f} ms (+{threshold:.0%})")
+        if current["queries"] > base["queries"]:
+            regressions.append(f"{name}: {current['queries']} queries > {base['queries']}")
+    return regressions
+
+
+def load_baseline(path):
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path, results, meta):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"meta": meta, "routes": results}, f, indent=2, sort_keys=True)
+
+
+def scratch_sqlite_url():
+    fd, path = tempfile.mkstemp(prefix="library-bench-", suffix=".db")
+    os.close(fd)
+    return f"sqlite:///{path}", path
+
+
+def prepare_database():
+    db.drop_all()
+    db.create_all()
+    with db.engine.begin() as conn:
+        create_search_index(conn)
@@ -0,0 +1,21 @@
+import click
+from flask.cli import AppGroup
+from services.search_service import rebuild_search_index, drop_search_index
+from models import db
+
+search_cli = AppGroup('search', help='Manage the book full-text search index.')
+
+
+@search_cli.command('rebuild')
+def rebuild():
+    """Create the search index if missing and re-index every book."""
+    rebuild_search_index()
+    click.echo(f"Search index rebuilt ({db.engine.dialect.name}).")
+
+
+@search_cli.command('drop')
+def drop():
+    """Remove the search index; searches fall back to ilike."""
+    with db.engine.begin() as conn:
+        drop_search_index(conn)
+    click.echo("Search index dropped.")
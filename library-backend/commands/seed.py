@@ -0,0 +1,302 @@
+"""
+🌱 Deterministic synthetic data for scale testing: `flask seed`.
+
+The same --seed always produces the same rows. Rows are generated chunk by
+chunk and written with multi-row INSERTs (COPY on PostgreSQL/psycopg2), never
+through session.add, so tens of millions of rows load at driver speed with
+flat memory.
+"""
+import csv
+import io
+import random
+import time
+from datetime import datetime, timedelta, timezone
+import click
+from sqlalchemy import func, insert, select, text, update
+from models import db, User, Book, Borrow, BorrowStatus
+from services.password_service import hash_password
+from services.search_service import create_search_index, drop_search_index, search_index_ready
+from services.stats_service import reconcile_stats
+
+FIRST_NAMES = ["Aarav", "Priya", "Rohan", "Ananya", "Liam", "Olivia", "Noah", "Emma", "Mateo", "Sofia",
+               "Yuki", "Hana", "Omar", "Layla", "Ivan", "Nadia", "Kwame", "Amara", "Lucas", "Chloe"]
+LAST_NAMES = ["Sharma", "Tyagi", "Patel", "Smith", "Garcia", "Kim", "Nguyen", "Okafor", "Rossi", "Muller",
+              "Silva", "Tanaka", "Haddad", "Ivanova", "Mensah", "Dubois", "Cohen", "Singh", "Brown", "Lopez"]
+TITLE_WORDS = ["River", "Stone", "Night", "Garden", "Empire", "Shadow", "Glass", "Winter", "Machine", "Ocean",
+               "Silent", "Hidden", "Last", "Golden", "Broken", "Distant", "Paper", "Iron", "Burning", "Quiet"]
+TITLE_NOUNS = ["Kingdom", "Algorithms", "Letters", "Journey", "Theory", "Chronicles", "Equations", "Songs",
+               "Atlas", "Principles", "Memoirs", "Systems", "Tales", "Histories", "Handbook", "Secrets"]
+
+LOAN_DAYS = 14
+DEFAULT_PASSWORD = "password123"
+
+
+class DatasetGenerator:
+    """Produces rows for users, books and borrows from one seeded RNG per table."""
+
+    def __init__(self, users, books, borrows, seed=42, deleted_user_ratio=0.05, days=365,
+                 popularity_skew=3.0, first_user_id=1, first_book_id=1, with_admin=True, today=None):
+        self.users, self.books, self.borrows = users, books, borrows
+        self.seed = seed
+        self.deleted_user_ratio = deleted_user_ratio
+        self.days = days
+        self.popularity_skew = popularity_skew
+        self.first_user_id, self.first_book_id = first_user_id, first_book_id
+        self.with_admin = with_admin
+        self.today = today or datetime.now(timezone.utc).date()
+        self.now = datetime.combine(self.today, datetime.min.time())
+        # Multiplier used to scatter popular titles across the id range
+        self._scatter = self._coprime(books)
+
+    @staticmethod
+    def _coprime(n):
+        from math import gcd
+        candidate = 2654435761 % max(n, 1) or 1
+        while n > 1 and gcd(candidate, n) != 1:
+            candidate += 1
+        return candidate
+
+    def _rng(self, table):
+        return random.Random(f"{self.seed}:{table}")
+
+    def is_deleted_user(self, index):
+        # Stable per index so borrows can tell which borrowers were deleted
+        return random.Random(f"{self.seed}:deleted:{index}").random() < self.deleted_user_ratio
+
+    def user_identity(self, index):
+        first = FIRST_NAMES[index % len(FIRST_NAMES)]
+        last = LAST_NAMES[(index // len(FIRST_NAMES)) % len(LAST_NAMES)]
+        # Numbered by user id, not index, so a run appended to an existing dataset can't collide with it
+        return f"{first} {last}", f"{first.lower()}.{last.lower()}.{self.first_user_id + index}@example.edu"
+
+    def user_rows(self, start, size, password_hash):
+        rng = self._rng(f"users:{start}")
+        rows = []
+        for index in range(start, start + size):
+            if self.is_deleted_user(index):
+                continue
+            name, email = self.user_identity(index)
+            rows.append({
+                "id": self.first_user_id + index,
+                "name": name,
+                "email": email,
+                "password": password_hash,
+                "is_verified": rng.random() < 0.9,
+                "is_admin": self.with_admin and index == 0,
+            })
+        return rows
+
+    def book_rows(self, start, size):
+        rng = self._rng(f"books:{start}")
+        rows = []
+        for index in range(start, start + size):
+            title = f"The {rng.choice(TITLE_WORDS)} {rng.choice(TITLE_NOUNS)}"
+            if rng.random() < 0.3:
+                title += f", Volume {rng.randrange(1, 12)}"
+            copies = self.copies(index)
+            rows.append({
+                "id": self.first_book_id + index,
+                "title": title,
+                "author": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                "total_copies": copies,
+                "available_copies": copies,
+                "is_deleted": rng.random() < 0.02,
+            })
+        return rows
+
+    def copies(self, index):
+        # Mostly single copies, a long tail of course books with dozens
+        roll = random.Random(f"{self.seed}:copies:{index}").random()
+        if roll < 0.75:
+            return 1
+        if roll < 0.95:
+            return 2 + int(roll * 100) % 4
+        return 10 + int(roll * 1000) % 21
+
+    def popular_book(self, rng):
+        # u ** skew piles ranks near 0: a few titles get most of the loans
+        rank = int(self.books * rng.random() ** self.popularity_skew)
+        return self.first_book_id + (rank * self._scatter) % self.books
+
+    def borrow_rows(self, start, size, open_books):
+        """`open_books` (book id -> open loans) is shared across chunks so no book has more loans than copies."""
+        rng = self._rng(f"borrows:{start}")
+        rows = []
+        for _ in range(size):
+            user_index = rng.randrange(self.users)
+            book_id = self.popular_book(rng)
+            borrow_date = self.now - timedelta(days=rng.randrange(self.days), seconds=rng.randrange(86400))
+            due_date = (borrow_date + timedelta(days=LOAN_DAYS)).date()
+
+            if due_date < self.today:
+                still_out = rng.random() < 0.15
+            else:
+                still_out = rng.random() < 0.6
+            if still_out and open_books.get(book_id, 0) >= self.copies(book_id - self.first_book_id):
+                still_out = False
+
+            if still_out:
+                open_books[book_id] = open_books.get(book_id, 0) + 1
+                return_date = None
+                status = BorrowStatus.OVERDUE if due_date < self.today else BorrowStatus.NOT_RETURNED
+            else:
+                # Most loans come back within the loan period, some up to ten days late
+                late = rng.random() < 0.2
+                latest = due_date + timedelta(days=10) if late else due_date
+                span = max((min(self.today, latest) - borrow_date.date()).days, 0)
+                return_date = borrow_date.date() + timedelta(days=rng.randint(0, span))
+                status = BorrowStatus.RETURNED_LATE if return_date > due_date else BorrowStatus.RETURNED
+
+            row = {
+                "user_id": self.first_user_id + user_index,
+                "user_name": None,
+                "user_email": None,
+                "is_deleted": False,
+                "book_id": book_id,
+                "borrow_date": borrow_date,
+                "due_date": due_date,
+                "return_date": return_date,
+                "status": status,
+            }
+            if self.is_deleted_user(user_index):
+                # What delete_user leaves behind: snapshot fields, no user_id
+                name, email = self.user_identity(user_index)
+                row.update(user_id=None, user_name=name, user_email=email, is_deleted=True)
+            rows.append(row)
+        return rows
+
+
+def _chunks(total, size):
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+
+def _copy_rows(table, rows):
+    """COPY rows into `table` on PostgreSQL via psycopg2; returns False if unavailable."""
+    if not rows:
+        return True
+    conn = db.session.connection()
+    if conn.dialect.name != 'postgresql' or conn.dialect.driver != 'psycopg2':
+        return False
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["\\N" if row[c] is None else row[c] for c in columns])
+    buffer.seek(0)
+    cursor = conn.connection.dbapi_connection.cursor()
+    cursor.copy_expert(
+        f'COPY "{table.name}" ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv, NULL \'\\N\')',
+        buffer
+    )
+    return True
+
+
+def _write(model, rows):
+    if rows and not _copy_rows(model.__table__, rows):
+        db.session.execute(insert(model), rows)
+
+
+def _fix_sequences():
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for table in ('user', 'book', 'borrow'):
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), COALESCE(MAX(id), 1)) FROM \"{table}\""
+        ))
+
+
+def _next_id(model):
+    return (db.session.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def seed_database(users, books, borrows, seed=42, chunk_size=10000, deleted_user_ratio=0.05,
+                  days=365, password=DEFAULT_PASSWORD, progress=None):
+    """
+    Append a synthetic dataset to the current database. `progress(table, done, total)`
+    is called after every chunk. Returns the generator used.
+    The first user is an admin only when the user table starts out empty.
+    """
+    progress = progress or (lambda table, done, total: None)
+    first_user_id = _next_id(User)
+    gen = DatasetGenerator(users, books, borrows, seed=seed, deleted_user_ratio=deleted_user_ratio,
+                           days=days, first_user_id=first_user_id, first_book_id=_next_id(Book),
+                           with_admin=first_user_id == 1)
+
+    # The id lookups above opened a transaction on the session; end it, or the
+    # DDL below (on its own connection) waits for its locks on Postgres/MySQL
+    db.session.commit()
+
+    # Re-indexing once at the end beats firing the FTS triggers per row
+    reindex = search_index_ready()
+    if reindex:
+        with db.engine.begin() as conn:
+            drop_search_index(conn)
+
+    try:
+        password_hash = hash_password(password)
+        for start, size in _chunks(users, chunk_size):
+            _write(User, gen.user_rows(start, size, password_hash))
+            db.session.commit()
+            progress("users", start + size, users)
+
+        for start, size in _chunks(books, chunk_size):
+            _write(Book, gen.book_rows(start, size))
+            db.session.commit()
+            progress("books", start + size, books)
+
+        open_books = {}
+        if books and users:
+            for start, size in _chunks(borrows, chunk_size):
+                _write(Borrow, gen.borrow_rows(start, size, open_books))
+                db.session.commit()
+                progress("borrows", start + size, borrows)
+
+        # One set-based pass instead of tracking counters row by row
+        on_loan = select(func.count(Borrow.id))\
+            .where(Borrow.book_id == Book.id, Borrow.status.in_(BorrowStatus.OPEN))\
+            .scalar_subquery()
+        db.session.execute(
+            update(Book)
+            .where(Book.id >= gen.first_book_id)
+            .values(available_copies=Book.total_copies - on_loan)
+            .execution_options(synchronize_session=False)
+        )
+        _fix_sequences()
+        db.session.commit()
+        reconcile_stats()
+    finally:
+        if reindex:
+            # Same reason: a failed chunk leaves the session's transaction open
+            db.session.rollback()
+            with db.engine.begin() as conn:
+                create_search_index(conn)
+
+    return gen
+
+
+@click.command('seed')
+@click.option('--users', default=1000, show_default=True)
+@click.option('--books', default=10000, show_default=True)
+@click.option('--borrows', default=20000, show_default=True)
+@click.option('--seed', 'seed_value', default=42, show_default=True, help='Same seed, same data.')
+@click.option('--chunk-size', default=10000, show_default=True, help='Rows per INSERT/COPY batch.')
+@click.option('--deleted-users', default=0.05, show_default=True, help='Share of borrowers that were deleted.')
+@click.option('--days', default=365, show_default=True, help='How far back loans go.')
+def seed_command(users, books, borrows, seed_value, chunk_size, deleted_users, days):
+    """Generate a realistic, reproducible dataset of users, books and loans."""
+    started = time.perf_counter()
+    last = {"table": None, "at": started}
+
+    def progress(table, done, total):
+        now = time.perf_counter()
+        if last["table"] != table:
+            last["table"], last["start"] = table, last["at"]
+        last["at"] = now
+        elapsed = now - last["start"]
+        rate = done / elapsed if elapsed else 0
+        click.echo(f"\r{table:<8} {done:>12,}/{total:,}  {rate:,.0f} rows/s", nl=done >= total)
+
+    seed_database(users, books, borrows, seed=seed_value, chunk_size=chunk_size,
+                  deleted_user_ratio=deleted_users, days=days, progress=progress)
+    click.echo(f"Done in {time.perf_counter() - started:.1f}s. User password: {DEFAULT_PASSWORD}")
@@ -0,0 +1,100 @@
+"""
+🚀 Cold-start benchmark.
+
+Each run is a fresh interpreter that imports the app, calls create_app() and
+serves one request, which is what a scale-to-zero instance does before it can
+answer. One extra run under `python -X importtime` shows where the import
+time goes, and the web path must not pull in modules that only the CLI needs.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+from sqlalchemy import create_engine
+from models import db
+from services.search_service import create_search_index
+
+# Only `flask ...` commands need these; a web worker importing them is a regression
+CLI_ONLY_MODULES = ("flask_migrate", "alembic", "commands.bench", "commands.seed", "commands.route_bench")
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+response = app.test_client().get(sys.argv[1])
+served = time.perf_counter()
+print(json.dumps({
+    "import": (imported - start) * 1000,
+    "create_app": (created - imported) * 1000,
+    "first_request": (served - created) * 1000,
+    "status": response.status_code,
+    "cli_only": [m for m in sys.argv[2:] if m in sys.modules],
+}))
+"""
+
+
+def prepare_schema(database_url):
+    engine = create_engine(database_url)
+    try:
+        db.metadata.create_all(engine)
+        with engine.begin() as conn:
+            create_search_index(conn)
+    finally:
+        engine.dispose()
+
+
+def _child_env(database_url):
+    env = dict(os.environ)
+    env["DATABASE_URL"] = database_url
+    # Running under `flask` would otherwise make the child boot like a CLI process
+    env.pop("FLASK_RUN_FROM_CLI", None)
+    env.pop("DATABASE_REPLICA_URL", None)
+    return env
+
+
+def cold_start(app_root, database_url, path, importtime=False):
+    """One boot in a fresh interpreter. Returns (timings, importtime stderr)."""
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", CHILD, path, *CLI_ONLY_MODULES]
+    proc = subprocess.run(cmd, cwd=app_root, env=_child_env(database_url),
+                          capture_output=True, text=True, check=False)
+    if proc.returncode != 0:
+        raise RuntimeError(f"cold start failed:\n{proc.stderr[-2000:]}")
+    # The app's own log lines share stdout with the result
+    result = next(line for line in reversed(proc.stdout.splitlines()) if line.startswith('{"import"'))
+    timings = json.loads(result)
+    timings["total"] = timings["import"] + timings["create_app"] + timings["first_request"]
+    return timings, proc.stderr
+
+
+def summarize(runs):
+    return {key: statistics.median(r[key] for r in runs)
+            for key in ("import", "create_app", "first_request", "total")}
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth)] from `-X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def import_cost_by_package(rows, top=15):
+    """Self time summed per top-level package, biggest first, in ms."""
+    totals = {}
+    for name, self_us, _, _ in rows:
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0) + self_us
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    return [(package, us / 1000) for package, us in ranked[:top]]
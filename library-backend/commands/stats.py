@@ -0,0 +1,33 @@
+import time
+import click
+from flask.cli import AppGroup
+from services.stats_service import compute_stats, read_stats, reconcile_stats
+
+stats_cli = AppGroup('stats', help='Dashboard counters (stat_counter table).')
+
+
+@stats_cli.command('reconcile')
+@click.option('--interval', default=0, show_default=True,
+              help='Seconds between runs. 0 runs once, suitable for cron.')
+def reconcile_command(interval):
+    """Recount everything and overwrite counters that drifted."""
+    while True:
+        drift = reconcile_stats()
+        if drift:
+            for name, delta in drift.items():
+                click.echo(f"{name}: was off by {delta:+d}, fixed")
+        else:
+            click.echo("Counters are in sync.")
+        if not interval:
+            break
+        time.sleep(interval)
+
+
+@stats_cli.command('show')
+def show_command():
+    """Print the stored counters next to freshly computed totals."""
+    stored, _ = read_stats()
+    actual = compute_stats()
+    click.echo(f"{'counter':<18}{'stored':>12}{'actual':>12}")
+    for name, value in stored.items():
+        click.echo(f"{name:<18}{value:>12}{actual[name]:>12}")
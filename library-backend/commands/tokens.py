@@ -0,0 +1,21 @@
+import click
+from flask.cli import AppGroup
+from services.revocation_service import prune_revocations, revoke_user_sessions
+from models import db
+
+tokens_cli = AppGroup('tokens', help='Login token revocation (token_revocation table).')
+
+
+@tokens_cli.command('prune')
+def prune_command():
+    """Delete revocations whose tokens have all expired; cron it daily."""
+    click.echo(f"Deleted {prune_revocations()} expired revocation(s).")
+
+
+@tokens_cli.command('revoke')
+@click.argument('user_ids', nargs=-1, type=int, required=True)
+def revoke_command(user_ids):
+    """Log the given users out everywhere."""
+    count = revoke_user_sessions(list(user_ids), 'admin_cli')
+    db.session.commit()
+    click.echo(f"Revoked the sessions of {count} user(s).")
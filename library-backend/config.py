@@ -3,6 +3,47 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def engine_options():
+    """
+    Pool settings for every engine (primary and replica). pool_size, max_overflow
+    and pool_timeout are only passed when set, since SQLite's pools reject them.
+    """
+    options = {
+        "pool_pre_ping": os.environ.get('DB_POOL_PRE_PING', 'True').lower() == 'true',
+        # Below MySQL's default wait_timeout and most proxies' idle limits
+        "pool_recycle": int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+    }
+    for key, env, cast in (("pool_size", 'DB_POOL_SIZE', int),
+                           ("max_overflow", 'DB_MAX_OVERFLOW', int),
+                           ("pool_timeout", 'DB_POOL_TIMEOUT', float)):
+        if os.environ.get(env):
+            options[key] = cast(os.environ[env])
+    return options
+
+
+def rate_limits():
+    """
+    Per-route limits for utils/rate_limit.py, per client IP and per email in the
+    body. Override one with e.g. RATE_LIMIT_LOGIN_EMAIL="10/minute", or "" to disable it.
+    """
+    defaults = {
+        # Every attempt costs a bcrypt verification
+        "login": ("20/minute", "5/minute"),
+        # These write to the database and send an email
+        "register": ("5/minute", "3/hour"),
+        "forgot_password": ("5/minute", "3/hour"),
+        "resend_verification": ("5/minute", "3/hour"),
+    }
+    return {
+        name: {
+            "ip": os.environ.get(f"RATE_LIMIT_{name.upper()}_IP", ip),
+            "email": os.environ.get(f"RATE_LIMIT_{name.upper()}_EMAIL", email),
+        }
+        for name, (ip, email) in defaults.items()
+    }
+
+
 class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY") or "supersecretkey"
     JWT_COOKIE_SECURE = False
@@ -12,17 +53,94 @@ class Config:
     JWT_COOKIE_CSRF_PROTECT = False
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options()
+    # Optional read replica for the list endpoints, see utils/db_routing.py
+    SQLALCHEMY_BINDS = {'replica': os.environ['DATABASE_REPLICA_URL']} if os.environ.get('DATABASE_REPLICA_URL') else {}
+    # After a write, the same client reads from the primary for this long
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+
+    # bcrypt cost for new hashes; existing hashes are upgraded on the next login
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    # Processes used for hashing (0 hashes inline on the request thread)
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    # Hashes in flight per app process before requests get a 503: one limit shared by all its
+    # request threads, not multiplied by PASSWORD_HASH_WORKERS
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 32))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+
+    # POST /api/books/bulk
+    BULK_IMPORT_BATCH_SIZE = int(os.environ.get('BULK_IMPORT_BATCH_SIZE', 1000))
+    BULK_IMPORT_MAX_BATCH_SIZE = 10000
+    BULK_IMPORT_MAX_ERRORS = int(os.environ.get('BULK_IMPORT_MAX_ERRORS', 1000))
+
+    # Ids accepted per request by the bulk admin endpoints (users and books)
+    BULK_ADMIN_MAX_IDS = int(os.environ.get('BULK_ADMIN_MAX_IDS', 5000))
+
+    # Rows fetched per round trip by the streaming CSV/NDJSON exports
+    EXPORT_YIELD_PER = int(os.environ.get('EXPORT_YIELD_PER', 1000))
+
+    # Response cache for the public GET /api/books/available
+    CATALOG_CACHE_SIZE = int(os.environ.get('CATALOG_CACHE_SIZE', 512))
+    CATALOG_CACHE_TTL = int(os.environ.get('CATALOG_CACHE_TTL', 30))
+    # Browser max-age; 0 sends "no-cache" so clients always revalidate with If-None-Match
+    CATALOG_CACHE_MAX_AGE = int(os.environ.get('CATALOG_CACHE_MAX_AGE', 0))
+
+    # Totals of the paginated lists (utils/page_counts.py): cached per filter set,
+    # "estimate" uses PostgreSQL planner estimates instead of COUNT(*); clients can pass count= or include_total=false
+    PAGE_COUNT_MODE = os.environ.get('PAGE_COUNT_MODE', 'exact')
+    PAGE_COUNT_CACHE_SIZE = int(os.environ.get('PAGE_COUNT_CACHE_SIZE', 1024))
+    PAGE_COUNT_CACHE_TTL = int(os.environ.get('PAGE_COUNT_CACHE_TTL', 30))
+
+    # Prometheus metrics at GET /metrics (request latency, status codes, SQL per request)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+    # Who may scrape it: a bearer token and/or the scraper's networks ("10.0.0.0/8,192.168.1.5");
+    # with neither set only loopback can. Behind a proxy, the allowlist sees the proxy's address
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_ALLOWED_NETWORKS = os.environ.get('METRICS_ALLOWED_NETWORKS', '')
+
+    # "fast" encodes responses with orjson when installed (utils/json_provider.py), "default" keeps Flask's encoder
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'fast')
+
+    # Logging (utils/logging_pipeline.py): JSON lines through a queue, written by a background thread
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    # Per-logger overrides, e.g. "services.outbox_service=DEBUG,werkzeug=WARNING"
+    LOG_LEVELS = os.environ.get('LOG_LEVELS', '')
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')  # or "text"
+    # Fraction of INFO/DEBUG records kept per logger; warnings and errors are always kept
+    LOG_SAMPLE_RATES = os.environ.get('LOG_SAMPLE_RATES', 'app.access=0.1')
+    # Records waiting for the writer thread; beyond this they are dropped, not waited on
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+    ACCESS_LOG_ENABLED = os.environ.get('ACCESS_LOG_ENABLED', 'True').lower() == 'true'
+
+    # Login, registration and the email endpoints are rate limited (utils/rate_limit.py)
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+    RATE_LIMITS = rate_limits()
+    # memory:// keeps buckets per process; redis://host:6379/0 shares them between workers
+    RATE_LIMIT_STORAGE_URI = os.environ.get('RATE_LIMIT_STORAGE_URI', 'memory://')
+    # Proxies in front of the app whose X-Forwarded-For can be trusted for the client IP
+    RATE_LIMIT_TRUSTED_PROXIES = int(os.environ.get('RATE_LIMIT_TRUSTED_PROXIES', 0))
+
+    # Verified JWT claims kept in memory per worker, 0 disables the cache
+    AUTH_CLAIMS_CACHE_SIZE = int(os.environ.get('AUTH_CLAIMS_CACHE_SIZE', 4096))
+    # How stale another worker's copy of the token revocation log may get (logout, password reset)
+    REVOCATION_REFRESH_SECONDS = float(os.environ.get('REVOCATION_REFRESH_SECONDS', 5))
 
     
     BACKEND_URL = os.environ.get("BACKEND_URL", "")
 
     
-    MAIL_SERVER = 'smtp.gmail.com'
-    MAIL_PORT = 465  
-    MAIL_USE_SSL = True
+    MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
+    MAIL_PORT = int(os.environ.get('MAIL_PORT', 465))
+    MAIL_USE_SSL = os.environ.get('MAIL_USE_SSL', 'True').lower() == 'true'
+    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'False').lower() == 'true'
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')  
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')  
-    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_USERNAME')  
+    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER') or os.environ.get('MAIL_USERNAME')
+
+    # Outgoing mail is queued in outbox_email and sent by `flask outbox work`
+    OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 50))
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 6))
+    OUTBOX_RETRY_BASE_SECONDS = int(os.environ.get('OUTBOX_RETRY_BASE_SECONDS', 30))
 
 
     
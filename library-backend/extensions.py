@@ -2,7 +2,8 @@
 from flask_mail import Mail
 from flask_bcrypt import Bcrypt
 from flask_sqlalchemy import SQLAlchemy
+from utils.db_routing import RoutingSession
 
 bcrypt = Bcrypt()
 mail = Mail()
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
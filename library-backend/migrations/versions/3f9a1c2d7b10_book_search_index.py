@@ -0,0 +1,26 @@
+"""Full-text search index on book title/author
+
+Revision ID: 3f9a1c2d7b10
+Revises: c1c8dbc05561
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from services.search_service import create_search_index, drop_search_index
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2d7b10'
+down_revision = 'c1c8dbc05561'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite: FTS5 table + triggers, PostgreSQL: tsvector + GIN, MySQL: FULLTEXT
+    create_search_index(op.get_bind())
+
+
+def downgrade():
+    drop_search_index(op.get_bind())
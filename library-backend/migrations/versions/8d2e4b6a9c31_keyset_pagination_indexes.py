@@ -0,0 +1,40 @@
+"""Indexes backing keyset pagination sort keys
+
+Revision ID: 8d2e4b6a9c31
+Revises: 3f9a1c2d7b10
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2e4b6a9c31'
+down_revision = '3f9a1c2d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('book', schema=None) as batch_op:
+        batch_op.create_index('ix_book_title_id', ['title', 'id'], unique=False)
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_index('ix_user_name_id', ['name', 'id'], unique=False)
+
+    with op.batch_alter_table('borrow', schema=None) as batch_op:
+        batch_op.create_index('ix_borrow_borrow_date_id', ['borrow_date', 'id'], unique=False)
+        batch_op.create_index('ix_borrow_user_id_borrow_date_id', ['user_id', 'borrow_date', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('borrow', schema=None) as batch_op:
+        batch_op.drop_index('ix_borrow_user_id_borrow_date_id')
+        batch_op.drop_index('ix_borrow_borrow_date_id')
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_name_id')
+
+    with op.batch_alter_table('book', schema=None) as batch_op:
+        batch_op.drop_index('ix_book_title_id')
@@ -0,0 +1,47 @@
+"""Token generations and the revocation log
+
+Revision ID: a6c0d9e2f417
+Revises: f3b2d8c61a09
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c0d9e2f417'
+down_revision = 'f3b2d8c61a09'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('token_generation', sa.Integer(), nullable=False, server_default='0'))
+
+    op.create_table(
+        'token_revocation',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('generation', sa.Integer(), nullable=True),
+        sa.Column('jti', sa.String(length=32), nullable=True),
+        sa.Column('reason', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('token_revocation', schema=None) as batch_op:
+        batch_op.create_index('ix_token_revocation_created_at', ['created_at'], unique=False)
+        batch_op.create_index('ix_token_revocation_expires_at', ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('token_revocation', schema=None) as batch_op:
+        batch_op.drop_index('ix_token_revocation_expires_at')
+        batch_op.drop_index('ix_token_revocation_created_at')
+
+    op.drop_table('token_revocation')
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('token_generation')
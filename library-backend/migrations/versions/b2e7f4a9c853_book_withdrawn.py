@@ -0,0 +1,71 @@
+"""Withdrawn flag for books taken off the shelf
+
+Revision ID: b2e7f4a9c853
+Revises: a6c0d9e2f417
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from services.search_service import create_search_index, drop_search_index
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2e7f4a9c853'
+down_revision = 'a6c0d9e2f417'
+branch_labels = None
+depends_on = None
+
+
+book = sa.table(
+    'book',
+    sa.column('id', sa.Integer),
+    sa.column('total_copies', sa.Integer),
+    sa.column('available_copies', sa.Integer),
+    sa.column('is_withdrawn', sa.Boolean),
+)
+borrow = sa.table(
+    'borrow',
+    sa.column('book_id', sa.Integer),
+    sa.column('status', sa.String),
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    # Batch mode rebuilds the table on SQLite, which would drop the FTS triggers
+    sqlite = bind.dialect.name == 'sqlite'
+    if sqlite:
+        drop_search_index(bind)
+
+    with op.batch_alter_table('book', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_withdrawn', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+    # No copy on the shelf although some are not on loan: it was taken off the shelf
+    on_loan = (
+        sa.select(sa.func.count())
+        .select_from(borrow)
+        .where(borrow.c.book_id == book.c.id, borrow.c.status.in_(['Not Returned', 'Overdue']))
+        .scalar_subquery()
+    )
+    op.execute(
+        book.update()
+        .where(book.c.available_copies == 0, book.c.total_copies > on_loan)
+        .values(is_withdrawn=True)
+    )
+
+    if sqlite:
+        create_search_index(bind)
+
+
+def downgrade():
+    bind = op.get_bind()
+    sqlite = bind.dialect.name == 'sqlite'
+    if sqlite:
+        drop_search_index(bind)
+
+    with op.batch_alter_table('book', schema=None) as batch_op:
+        batch_op.drop_column('is_withdrawn')
+
+    if sqlite:
+        create_search_index(bind)
@@ -0,0 +1,52 @@
+"""Materialize borrow status and index it
+
+Revision ID: b47c0e5f2a18
+Revises: 8d2e4b6a9c31
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from datetime import datetime, timezone
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b47c0e5f2a18'
+down_revision = '8d2e4b6a9c31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    borrow = sa.table(
+        'borrow',
+        sa.column('status', sa.String),
+        sa.column('return_date', sa.Date),
+        sa.column('due_date', sa.Date),
+    )
+    today = datetime.now(timezone.utc).date()
+
+    # Bring the stored status in line with what the endpoints used to compute
+    op.execute(
+        borrow.update()
+        .where(borrow.c.return_date.isnot(None), borrow.c.status.notin_(['Returned', 'Returned (Late)']))
+        .values(status='Returned')
+    )
+    op.execute(
+        borrow.update()
+        .where(borrow.c.return_date.is_(None), borrow.c.due_date < today)
+        .values(status='Overdue')
+    )
+    op.execute(
+        borrow.update()
+        .where(borrow.c.return_date.is_(None), sa.or_(borrow.c.due_date >= today, borrow.c.due_date.is_(None)))
+        .values(status='Not Returned')
+    )
+
+    with op.batch_alter_table('borrow', schema=None) as batch_op:
+        batch_op.create_index('ix_borrow_status_due_date', ['status', 'due_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('borrow', schema=None) as batch_op:
+        batch_op.drop_index('ix_borrow_status_due_date')
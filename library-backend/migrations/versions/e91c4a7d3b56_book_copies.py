@@ -0,0 +1,107 @@
+"""Copies per book: total/available counters instead of duplicate rows
+
+Revision ID: e91c4a7d3b56
+Revises: d5a83f17c2e4
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from services.search_service import create_search_index, drop_search_index
+
+
+# revision identifiers, used by Alembic.
+revision = 'e91c4a7d3b56'
+down_revision = 'd5a83f17c2e4'
+branch_labels = None
+depends_on = None
+
+
+book = sa.table(
+    'book',
+    sa.column('id', sa.Integer),
+    sa.column('title', sa.String),
+    sa.column('author', sa.String),
+    sa.column('available', sa.Boolean),
+    sa.column('total_copies', sa.Integer),
+    sa.column('available_copies', sa.Integer),
+    sa.column('is_deleted', sa.Boolean),
+)
+borrow = sa.table(
+    'borrow',
+    sa.column('book_id', sa.Integer),
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    # Batch mode rebuilds the table on SQLite, which would drop the FTS triggers
+    sqlite = bind.dialect.name == 'sqlite'
+    if sqlite:
+        drop_search_index(bind)
+
+    with op.batch_alter_table('book', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_copies', sa.Integer(), nullable=False, server_default='1'))
+        batch_op.add_column(sa.Column('available_copies', sa.Integer(), nullable=False, server_default='1'))
+
+    op.execute(
+        book.update().values(
+            available_copies=sa.case((book.c.available == sa.false(), 0), else_=1)
+        )
+    )
+
+    # Collapse active rows with the same title and author into the lowest id:
+    # it takes over the copies and the loans, the other rows go away.
+    groups = bind.execute(
+        sa.select(
+            sa.func.min(book.c.id),
+            book.c.title,
+            book.c.author,
+            sa.func.count(),
+            sa.func.sum(book.c.available_copies),
+        )
+        .where(book.c.is_deleted == sa.false())
+        .group_by(book.c.title, book.c.author)
+        .having(sa.func.count() > 1)
+    ).all()
+    for keeper, title, author, copies, on_shelf in groups:
+        duplicates = sa.select(book.c.id).where(
+            book.c.title == title, book.c.author == author,
+            book.c.is_deleted == sa.false(), book.c.id != keeper
+        )
+        op.execute(borrow.update().where(borrow.c.book_id.in_(duplicates)).values(book_id=keeper))
+        op.execute(book.update().where(book.c.id == keeper).values(total_copies=copies, available_copies=on_shelf))
+        op.execute(book.delete().where(
+            book.c.title == title, book.c.author == author,
+            book.c.is_deleted == sa.false(), book.c.id != keeper
+        ))
+
+    with op.batch_alter_table('book', schema=None) as batch_op:
+        batch_op.drop_column('available')
+        batch_op.create_check_constraint(
+            'ck_book_copies', 'available_copies >= 0 AND available_copies <= total_copies'
+        )
+
+    if sqlite:
+        create_search_index(bind)
+
+
+def downgrade():
+    # Collapsed duplicates are not split back into separate rows
+    bind = op.get_bind()
+    sqlite = bind.dialect.name == 'sqlite'
+    if sqlite:
+        drop_search_index(bind)
+
+    with op.batch_alter_table('book', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('available', sa.Boolean(), nullable=True))
+
+    op.execute(book.update().values(available=book.c.available_copies > 0))
+
+    with op.batch_alter_table('book', schema=None) as batch_op:
+        batch_op.drop_constraint('ck_book_copies', type_='check')
+        batch_op.drop_column('available_copies')
+        batch_op.drop_column('total_copies')
+
+    if sqlite:
+        create_search_index(bind)
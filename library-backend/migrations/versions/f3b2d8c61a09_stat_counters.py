@@ -0,0 +1,54 @@
+"""Counters table for the admin dashboard
+
+Revision ID: f3b2d8c61a09
+Revises: e91c4a7d3b56
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from datetime import datetime, timezone
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b2d8c61a09'
+down_revision = 'e91c4a7d3b56'
+branch_labels = None
+depends_on = None
+
+
+book = sa.table('book', sa.column('is_deleted', sa.Boolean))
+borrow = sa.table('borrow', sa.column('status', sa.String))
+user = sa.table('user', sa.column('is_verified', sa.Boolean))
+
+
+def _count(bind, table, *where):
+    return bind.execute(sa.select(sa.func.count()).select_from(table).where(*where)).scalar()
+
+
+def upgrade():
+    stat_counter = op.create_table(
+        'stat_counter',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('value', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+    # Start from the real totals; `flask stats reconcile` recomputes them later
+    bind = op.get_bind()
+    verified = _count(bind, user, user.c.is_verified == sa.true())
+    values = {
+        'books': _count(bind, book, book.c.is_deleted == sa.false()),
+        'deleted_books': _count(bind, book, book.c.is_deleted == sa.true()),
+        'active_loans': _count(bind, borrow, borrow.c.status.in_(['Not Returned', 'Overdue'])),
+        'overdue_loans': _count(bind, borrow, borrow.c.status == 'Overdue'),
+        'verified_users': verified,
+        'unverified_users': _count(bind, user) - verified,
+    }
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    op.bulk_insert(stat_counter, [{'name': name, 'value': value, 'updated_at': now} for name, value in values.items()])
+
+
+def downgrade():
+    op.drop_table('stat_counter')
@@ -1,5 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Integer, String, Boolean
+from sqlalchemy import Integer, String, Boolean, case
+from sqlalchemy.ext.hybrid import hybrid_property
 from extensions import db
 from datetime import datetime
 
@@ -12,25 +13,49 @@ class User(db.Model):
     password = db.Column(String(200), nullable=False)
     is_verified = db.Column(Boolean, default=False)
     is_admin = db.Column(Boolean, default=False)
+    # Bumped to revoke every token issued so far (services/revocation_service.py)
+    token_generation = db.Column(Integer, nullable=False, default=0, server_default='0')
 
     borrowed_books = db.relationship('Borrow', back_populates='user')
 
+    __table_args__ = (
+        db.Index('ix_user_name_id', 'name', 'id'),
+    )
+
 class Book(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(150), nullable=False)
     author = db.Column(db.String(100), nullable=False)
-    available = db.Column(db.Boolean, default=True)
+    # One row per title; copies on the shelf are a counter, not extra rows
+    total_copies = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    available_copies = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     is_deleted = db.Column(Boolean, default=False, index=True)  
+    # Taken off the shelf by an admin: available_copies stays 0 and returns don't put copies back
+    is_withdrawn = db.Column(Boolean, nullable=False, default=False, server_default=db.false())
     borrowers = db.relationship('Borrow', back_populates='book')
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "title": self.title,
-            "author": self.author,
-            "available": self.available,
-            "is_deleted": self.is_deleted  
-        }
+    __table_args__ = (
+        db.Index('ix_book_title_id', 'title', 'id'),
+        db.CheckConstraint('available_copies >= 0 AND available_copies <= total_copies', name='ck_book_copies'),
+    )
+
+    @hybrid_property
+    def available(self):
+        return self.available_copies > 0
+
+    @classmethod
+    def copies_back_on_shelf(cls, count):
+        """available_copies after `count` copies come back (returned or added); none while withdrawn."""
+        return case((cls.is_withdrawn == True, cls.available_copies), else_=cls.available_copies + count)
+
+class BorrowStatus:
+    NOT_RETURNED = 'Not Returned'
+    OVERDUE = 'Overdue'
+    RETURNED = 'Returned'
+    RETURNED_LATE = 'Returned (Late)'
+
+    OPEN = (NOT_RETURNED, OVERDUE)
+    CLOSED = (RETURNED, RETURNED_LATE)
 
 class Borrow(db.Model):
     __tablename__ = 'borrow'
@@ -45,7 +70,64 @@ class Borrow(db.Model):
     return_date = db.Column(db.Date, nullable=True)
     
     due_date = db.Column(db.Date, nullable=True)
-    status = db.Column(db.String(20), default='Pending')  
+    # Kept current by borrow/return and the overdue sweeper (services/borrow_service.py)
+    status = db.Column(db.String(20), default='Pending')
 
     user = db.relationship('User', back_populates='borrowed_books', passive_deletes=True)
     book = db.relationship('Book', back_populates='borrowers')
+
+    __table_args__ = (
+        db.Index('ix_borrow_borrow_date_id', 'borrow_date', 'id'),
+        db.Index('ix_borrow_user_id_borrow_date_id', 'user_id', 'borrow_date', 'id'),
+        db.Index('ix_borrow_status_due_date', 'status', 'due_date'),
+    )
+
+
+class OutboxEmail(db.Model):
+    __tablename__ = 'outbox_email'
+
+    PENDING = 'pending'
+    SENT = 'sent'
+    DEAD = 'dead'
+
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(255), nullable=False)
+    recipients = db.Column(db.Text, nullable=False)  # comma separated
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_outbox_email_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+
+
+class StatCounter(db.Model):
+    """Dashboard totals kept up to date by the handlers that change them (see services/stats_service.py)."""
+    __tablename__ = 'stat_counter'
+
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class TokenRevocation(db.Model):
+    """
+    Append-only log of revocations, read incrementally by every worker.
+    A row either retires all of a user's tokens below `generation` or a single
+    token by `jti`; it can be pruned once the tokens it covers have expired.
+    """
+    __tablename__ = 'token_revocation'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # No foreign key: the row has to outlive a deleted user
+    user_id = db.Column(db.Integer, nullable=False)
+    generation = db.Column(db.Integer, nullable=True)
+    jti = db.Column(db.String(32), nullable=True)
+    reason = db.Column(db.String(20), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
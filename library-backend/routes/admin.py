@@ -0,0 +1,23 @@
+from flask import Blueprint, jsonify
+from .decorator import token_required
+from services.stats_service import read_stats
+
+admin_bp = Blueprint('admin', __name__)
+
+
+def is_admin(user_data):
+    return user_data.get("is_admin") == 1
+
+
+@admin_bp.route('/stats', methods=['GET'])
+@token_required
+def get_stats(user_data):
+    """📊 Dashboard totals, read from the stat_counter table (no table scans)."""
+    if not is_admin(user_data):
+        return jsonify({"msg": "Admin only"}), 403
+
+    stats, updated_at = read_stats()
+    return jsonify({
+        "stats": stats,
+        "updatedAt": updated_at.isoformat() if updated_at else None
+    })
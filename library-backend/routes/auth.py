@@ -1,27 +1,21 @@
 from flask import Blueprint, request, jsonify, current_app, redirect
 from models import db, User
-from flask_bcrypt import Bcrypt
-from flask_mail import Message
-from extensions import mail
-from threading import Thread
 import jwt
 import os
 import datetime
 from flask import make_response
 from flask_jwt_extended import create_access_token, set_access_cookies
-bcrypt = Bcrypt()
 auth_bp = Blueprint('auth', __name__)
 from .decorator import token_required  
+from utils.rate_limit import rate_limited
 from sqlalchemy import text  
-from services.auth_services import register_user, login_user, handle_reset_password
+from services.auth_services import register_user, login_user, logout_user, handle_reset_password
 
 from services.mail_services import handle_forgot_password, resend_verification_email,verify_email_token
-from dotenv import load_dotenv 
-
-load_dotenv()
 
 
 @auth_bp.route('/forgot-password', methods=['POST'])
+@rate_limited('forgot_password')
 def forgot_password():
     data = request.get_json()
     email = data.get('email')
@@ -49,6 +43,7 @@ def reset_password():
 
 
 @auth_bp.route('/resend-verification', methods=['POST'])
+@rate_limited('resend_verification')
 def resend_verification():
     data = request.get_json()
     email = data.get('email')
@@ -90,6 +85,7 @@ def protected_route(current_user):
     return jsonify({"message": "Access granted", "user": current_user}), 200
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limited('login')
 def login():
     try:
         data = request.get_json()
@@ -102,7 +98,14 @@ def login():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@auth_bp.route('/logout', methods=['POST'])
+@token_required
+def logout(current_user):
+    data = request.get_json(silent=True) or {}
+    return logout_user(current_user, everywhere=bool(data.get('everywhere')))
+
 @auth_bp.route('/register', methods=['POST'])
+@rate_limited('register')
 def register():
     try:
         data = request.get_json()
@@ -1,19 +1,40 @@
-from math import ceil
-from flask import Blueprint, request, jsonify
-from models import db, Book, Borrow, User
+from flask import Blueprint, request, jsonify, current_app
+from models import db, Book, Borrow, User, BorrowStatus
 from .decorator import token_required
-from datetime import timedelta, datetime, timezone
-import traceback
+import logging
 from sqlalchemy.orm import aliased
-from sqlalchemy import or_
-from sqlalchemy import case, literal_column
+from sqlalchemy import and_, or_, select, update, false, func
+from services.search_service import apply_book_search
+from services.borrow_service import filter_by_return_status, checkout_book, checkin_book
+from services.import_service import import_books, iter_csv_records, iter_jsonl_records
+from services.user_service import parse_id_list
+from services.stats_service import bump
+from services.serializers import BOOK_FIELDS, book_to_dict, borrow_record_to_dict, borrow_history_to_dict
+from services.read_models import book_summaries
+from utils.response_cache import get_catalog_cache, catalog_changed, cached_json_response, normalized_query_key
+from utils.export import EXPORT_FORMATS, export_response
+from utils.db_routing import read_replica
+from utils.pagination import cursor_requested, get_cursor, keyset_paginate, offset_paginate, order_by_key, InvalidCursor
+from utils.page_counts import page_counter
 
 borrow_bp = Blueprint('borrow', __name__)
 
 books_bp = Blueprint('books', __name__, url_prefix='/api/books')
+logger = logging.getLogger(__name__)
+
+# Stable sort keys shared by page (offset) and cursor (keyset) pagination.
+BOOK_SORT_KEY = (Book.title, Book.id)
+BORROW_SORT_KEY = (Borrow.borrow_date, Borrow.id)
+
+BOOK_EXPORT_FIELDS = list(BOOK_FIELDS)
+BORROW_EXPORT_FIELDS = [
+    "borrow_id", "borrow_date", "due_date", "return_date", "borrow_status",
+    "user_id", "user_name", "user_email", "account_status",
+    "book_id", "book_title", "book_author",
+]
 
 def is_admin(user_data):
-    return True  
+    return user_data.get("is_admin") == 1
 
 @books_bp.route('', methods=['POST'])
 @token_required
@@ -24,10 +45,78 @@ def add_book(user_data):
     data = request.get_json()
     if not data or 'title' not in data or 'author' not in data:
         return jsonify({"msg": "Missing required fields: title and author"}), 400
-    new_book = Book(title=data['title'], author=data['author'], available=data.get('available', True))
+    copies = data.get('copies', 1)
+    if not isinstance(copies, int) or isinstance(copies, bool) or copies < 1:
+        return jsonify({"msg": "copies must be a positive integer"}), 400
+    on_shelf = copies if data.get('available', True) else 0
+
+    # Same title and author already in the catalog: add copies instead of a duplicate row
+    existing = db.session.execute(
+        update(Book)
+        .where(Book.title == data['title'], Book.author == data['author'], Book.is_deleted == False)
+        .values(total_copies=Book.total_copies + copies, available_copies=Book.copies_back_on_shelf(on_shelf))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if existing:
+        db.session.commit()
+        catalog_changed()
+        book = Book.query.filter_by(title=data['title'], author=data['author'], is_deleted=False).first()
+        return jsonify(book_to_dict(book)), 200
+
+    new_book = Book(title=data['title'], author=data['author'], total_copies=copies, available_copies=on_shelf)
     db.session.add(new_book)
+    bump(books=1)
     db.session.commit()
-    return jsonify(new_book.to_dict()), 201
+    catalog_changed()
+    return jsonify(book_to_dict(new_book)), 201
+
+JSONL_MIMETYPES = {'application/x-ndjson', 'application/jsonl', 'application/x-jsonlines', 'application/jsonlines'}
+
+def _bulk_upload_source():
+    """Return (binary stream, format) for a raw-body or multipart upload."""
+    fmt = request.args.get('format', '').lower()
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        if not upload:
+            return None, None
+        stream = upload.stream
+        if not fmt:
+            name = (upload.filename or '').lower()
+            fmt = 'jsonl' if name.endswith(('.jsonl', '.ndjson')) else 'csv'
+    else:
+        stream = request.stream
+        if not fmt:
+            fmt = 'jsonl' if request.mimetype in JSONL_MIMETYPES else 'csv'
+    if fmt in ('ndjson', 'json'):
+        fmt = 'jsonl'
+    return stream, fmt
+
+@books_bp.route('/bulk', methods=['POST'])
+@token_required
+def bulk_add_books(user_data):
+    if not is_admin(user_data):
+        return jsonify({"msg": "Admin only"}), 403
+
+    stream, fmt = _bulk_upload_source()
+    if stream is None:
+        return jsonify({"msg": "Missing file upload"}), 400
+    if fmt not in ('csv', 'jsonl'):
+        return jsonify({"msg": "Unsupported format, use csv or jsonl"}), 400
+
+    batch_size = request.args.get('batch_size', current_app.config['BULK_IMPORT_BATCH_SIZE'], type=int)
+    batch_size = max(1, min(batch_size, current_app.config['BULK_IMPORT_MAX_BATCH_SIZE']))
+
+    records = iter_csv_records(stream) if fmt == 'csv' else iter_jsonl_records(stream)
+    report = import_books(records, batch_size=batch_size, max_errors=current_app.config['BULK_IMPORT_MAX_ERRORS'])
+    written = report["inserted"] + report["merged"]
+    if written:
+        catalog_changed()
+    return jsonify(report), 201 if written else 400
+
+def _copies_on_loan(book_id):
+    return select(func.count(Borrow.id))\
+        .where(Borrow.book_id == book_id, Borrow.status.in_(BorrowStatus.OPEN))\
+        .scalar_subquery()
 
 @books_bp.route('/<int:book_id>', methods=['PUT'])
 @token_required
@@ -42,9 +131,42 @@ def update_book(user_data, book_id):
     data = request.get_json()
     book.title = data.get('title', book.title)
     book.author = data.get('author', book.author)
-    book.available = data.get('available', book.available)
+
+    # Counters change with guarded UPDATEs so a concurrent borrow/return isn't lost
+    counters = None
+    if 'copies' in data:
+        copies = data['copies']
+        if not isinstance(copies, int) or isinstance(copies, bool) or copies < 1:
+            return jsonify({"msg": "copies must be a positive integer"}), 400
+        # MySQL applies SET left to right: adjust available_copies before total_copies moves.
+        # A withdrawn book has nothing on the shelf, so only the loans bound the new total
+        counters = update(Book).where(
+            Book.id == book_id,
+            or_(
+                and_(Book.is_withdrawn == False, Book.available_copies + (copies - Book.total_copies) >= 0),
+                and_(Book.is_withdrawn == True, _copies_on_loan(book_id) <= copies),
+            )
+        ).ordered_values(
+            (Book.available_copies, Book.copies_back_on_shelf(copies - Book.total_copies)),
+            (Book.total_copies, copies),
+        )
+    elif 'available' in data:
+        # Take every copy off the shelf, or put back all copies that aren't on loan
+        if data['available']:
+            counters = update(Book).where(Book.id == book_id).values(
+                available_copies=Book.total_copies - _copies_on_loan(book_id), is_withdrawn=False
+            )
+        else:
+            counters = update(Book).where(Book.id == book_id).values(available_copies=0, is_withdrawn=True)
+
+    if counters is not None:
+        changed = db.session.execute(counters.execution_options(synchronize_session=False)).rowcount
+        if not changed:
+            db.session.rollback()
+            return jsonify({"msg": "More copies are on loan than the new number of copies"}), 400
     db.session.commit()
-    return jsonify(book.to_dict())
+    catalog_changed()
+    return jsonify(book_to_dict(book))
 
 @books_bp.route('/delete/<int:book_id>', methods=['DELETE'])
 @token_required
@@ -56,8 +178,11 @@ def delete_book(user_data, book_id):
     if not book:
         return jsonify({"msg": "Book not found"}), 404
 
-    book.is_deleted = True
+    if not book.is_deleted:
+        book.is_deleted = True
+        bump(books=-1, deleted_books=1)
     db.session.commit()
+    catalog_changed()
     return jsonify({"msg": "Book deleted"})
 
 @books_bp.route('/restore/<int:book_id>', methods=['PUT'])
@@ -70,101 +195,173 @@ def restore_book(user_data, book_id):
     if not book or not book.is_deleted:
         return jsonify({'message': 'Book not found or already active'}), 404
     book.is_deleted = False
+    bump(books=1, deleted_books=-1)
     db.session.commit()
+    catalog_changed()
     return jsonify({'message': 'Book restored successfully'})
 
-@books_bp.route('', methods=['GET'])
+@books_bp.route('/bulk/<action>', methods=['POST'])
 @token_required
-def get_all_books(user_data):
+def bulk_update_books(user_data, action):
+    """
+    🗂️ Soft-delete or restore many books at once: {"ids": [1, 2, 3]}.
+    One UPDATE statement, one transaction.
+    """
     if not is_admin(user_data):
         return jsonify({"msg": "Admin only"}), 403
+    if action not in ('delete', 'restore'):
+        return jsonify({"msg": "Unknown action, use delete or restore"}), 404
 
-    
-    search_query = request.args.get('search_query', '').lower()  
-    filter_status = request.args.get('filter_status', 'all')  
-    search_by = request.args.get('search_by', 'title')  
-    page = int(request.args.get('page', 1))  
-    limit = int(request.args.get('limit', 10))  
+    try:
+        ids = parse_id_list(request.get_json(silent=True), current_app.config['BULK_ADMIN_MAX_IDS'])
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    deleted = action == 'delete'
+    count = db.session.execute(
+        update(Book)
+        .where(Book.id.in_(ids), Book.is_deleted != deleted)
+        .values(is_deleted=deleted)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    moved = count if deleted else -count
+    bump(books=-moved, deleted_books=moved)
+    db.session.commit()
+    if count:
+        catalog_changed()
 
+    verb = "deleted" if deleted else "restored"
+    return jsonify({"msg": f"{count} book(s) {verb}", "count": count, "requested": len(ids)})
 
-    
-    query = Book.query
+def filter_books_query(query, args, ranked=True):
+    """Search and deleted-status filters shared by the admin book list and its export."""
+    search_query = args.get('search_query', '').lower()  
+    filter_status = args.get('filter_status', 'all')  
+    search_by = args.get('search_by', 'title')  
 
     
     if search_query:
-        if search_by == 'title':
-            query = query.filter(Book.title.ilike(f'%{search_query}%'))  
-        elif search_by == 'author':
-            query = query.filter(Book.author.ilike(f'%{search_query}%'))  
+        query = apply_book_search(query, search_query, search_by, ranked=ranked)
 
     
     if filter_status == 'deleted':
         query = query.filter(Book.is_deleted == True)
     elif filter_status == 'not_deleted':
         query = query.filter(Book.is_deleted == False)
+    return query
 
- 
-    total_books = query.count()
-    total_pages = ceil(total_books / limit)
+@books_bp.route('', methods=['GET'])
+@read_replica
+@token_required
+def get_all_books(user_data):
+    if not is_admin(user_data):
+        return jsonify({"msg": "Admin only"}), 403
 
     
-    books = query.offset((page - 1) * limit).limit(limit).all()
+    page = int(request.args.get('page', 1))  
+    limit = int(request.args.get('limit', 10))  
+
+    keyset = cursor_requested(request.args)
+    query = filter_books_query(book_summaries(), request.args, ranked=not keyset)
+
+    if keyset:
+        try:
+            books, next_cursor = keyset_paginate(query, BOOK_SORT_KEY, get_cursor(request.args), limit)
+        except InvalidCursor:
+            return jsonify({"msg": "Invalid cursor"}), 400
+        return jsonify({
+            'books': [book._asdict() for book in books],
+            'nextCursor': next_cursor
+        })
+ 
+    books, _, page_info = offset_paginate(
+        query, BOOK_SORT_KEY, page, limit, count=page_counter('books', 'admin', request.args)
+    )
 
     
     return jsonify({
-        'books': [book.to_dict() for book in books],
-        'totalPages': total_pages
+        'books': [book._asdict() for book in books],
+        **page_info
     })
 
+@books_bp.route('/export', methods=['GET'])
+@token_required
+def export_books(user_data):
+    if not is_admin(user_data):
+        return jsonify({"msg": "Admin only"}), 403
+
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"msg": "Unsupported format, use csv or ndjson"}), 400
+
+    query = order_by_key(filter_books_query(book_summaries(), request.args, ranked=False), (Book.id,))\
+        .yield_per(current_app.config['EXPORT_YIELD_PER'])
+    rows = (row._asdict() for row in query)
+    return export_response(rows, BOOK_EXPORT_FIELDS, fmt, 'books')
+
 @books_bp.route('/available', methods=['GET'])
 def get_available_books():
+    # Public and hot: served from the catalog cache, with ETag / 304 support.
+    # Misses read the primary: a page built from a lagging replica right after
+    # catalog_changed() would be served to every client for the whole TTL
+    return cached_json_response(
+        get_catalog_cache(),
+        normalized_query_key(request.args),
+        lambda: _load_available_books(request.args)
+    )
+
+def _load_available_books(args):
     
-    page = int(request.args.get('page', 1))
-    limit = int(request.args.get('limit', 10))
+    page = int(args.get('page', 1))
+    limit = int(args.get('limit', 10))
 
     
-    search_query = request.args.get('searchQuery', '')
-    search_by = request.args.get('searchBy', '')
-    filter_status = request.args.get('filterStatus', '')
+    search_query = args.get('searchQuery', '')
+    search_by = args.get('searchBy', '')
+    filter_status = args.get('filterStatus', '')
 
     
-    offset = (page - 1) * limit
-
-    
-    books_query = Book.query.filter_by(is_deleted=False)
+    books_query = book_summaries().filter(Book.is_deleted == False)
+    keyset = cursor_requested(args)
 
     
     if search_query and search_by:
-        
-        if search_by == 'title':
-            books_query = books_query.filter(Book.title.ilike(f'%{search_query}%'))
-        elif search_by == 'author':
-            books_query = books_query.filter(Book.author.ilike(f'%{search_query}%'))
+        books_query = apply_book_search(books_query, search_query, search_by, ranked=not keyset)
 
     
     if filter_status:
         if filter_status == 'available':
-            books_query = books_query.filter(Book.available == True)
+            books_query = books_query.filter(Book.available_copies > 0)
         elif filter_status == 'not_available':
-            books_query = books_query.filter(Book.available == False)
+            books_query = books_query.filter(Book.available_copies == 0)
         elif filter_status == 'all':  
             pass  
 
+    if keyset:
+        try:
+            books, next_cursor = keyset_paginate(books_query, BOOK_SORT_KEY, get_cursor(args), limit)
+        except InvalidCursor:
+            return {"msg": "Invalid cursor"}, 400
+        return {
+            "books": [book._asdict() for book in books],
+            "nextCursor": next_cursor
+        }, 200
+
     
-    total_books = books_query.count()
-    
-    
-    books = books_query.offset(offset).limit(limit).all()
+    books, total_books, page_info = offset_paginate(
+        books_query, BOOK_SORT_KEY, page, limit, count=page_counter('books', 'available', args)
+    )
 
     
     response = {
-        "books": [book.to_dict() for book in books],
-        "totalPages": (total_books // limit) + (1 if total_books % limit > 0 else 0),
+        "books": [book._asdict() for book in books],
+        **page_info,
         "currentPage": page,
-        "totalBooks": total_books
     }
+    if total_books is not None:
+        response["totalBooks"] = total_books
     
-    return jsonify(response)
+    return response, 200
 
 
 
@@ -182,176 +379,121 @@ def borrow_book(user_data):
     if not book_id:
         return jsonify({"message": "Missing book_id"}), 400
 
-    book = Book.query.get(book_id)
-    if not book:
-        return jsonify({"message": "Book not found"}), 404
-
-    if not book.available:
-        return jsonify({"message": "Book is not available"}), 400
-    borrow_date = datetime.now(timezone.utc)
-    due_date = borrow_date + timedelta(days=14)  
-
-    borrow = Borrow(
-            user_id=user_data["id"],
-            book_id=book_id,
-            borrow_date=borrow_date,
-            due_date=due_date,
-            status='Not Returned'  
-        )
+    result, status = checkout_book(user_data["id"], book_id)
+    return jsonify(result), status
 
-    book.available = False
-    db.session.add(borrow)
-    db.session.commit()
+def build_borrow_records_query(args):
+    """Borrow records joined with borrower and book, filtered like the admin records page."""
+    search_query = args.get('searchQuery', '')
+    status_filter = args.get('returnStatus', '')
+    account_status_filter = args.get('accountStatus', '')
+    search_by = args.get('searchBy', 'book')  
 
-    return jsonify({
-        "message": f"You have borrowed '{book.title}'.",
-        "due_date": due_date.strftime("%Y-%m-%d")
-    })
+    
+    query = db.session.query(
+        Borrow.id,
+        Borrow.borrow_date,
+        Borrow.due_date,
+        Borrow.return_date,
+        Borrow.status,
+        Borrow.is_deleted.label('user_is_deleted'),
+        User.id.label('user_id'),
+        User.name.label('user_name'),
+        Borrow.user_name.label('borrow_user_name'),
+        Borrow.user_email.label('borrow_user_email'),
+        User.email.label('user_email'),
+        Book.id.label('book_id'),
+        Book.title.label('book_title'),
+        Book.author.label('book_author')
+    ).outerjoin(User, Borrow.user_id == User.id)\
+     .outerjoin(Book, Borrow.book_id == Book.id)
+
+    if search_query:
+        if search_by == 'book':
+            query = query.filter(Book.title.ilike(f'%{search_query}%'))
+
+        elif search_by == 'author':
+            query = query.filter(Book.author.ilike(f'%{search_query}%'))
+
+        elif search_by == 'borrower':
+            query = query.filter(
+                Borrow.user_id.is_(None),
+                Borrow.user_name.ilike(f"%{search_query}%")
+            ).union(
+                query.filter(User.name.ilike(f'%{search_query}%'))
+            )
+
+        elif search_by == 'borrowerEmail':
+            query = query.filter(
+                Borrow.user_id.is_(None),
+                Borrow.user_email.ilike(f"%{search_query}%")
+            ).union(
+                query.filter(User.email.ilike(f'%{search_query}%'))
+            )
+
+    
+    query = filter_by_return_status(query, status_filter)
+
+    
+    if account_status_filter:
+        account_status_filter = account_status_filter.lower()
+        if account_status_filter == "active":
+            query = query.filter(Borrow.is_deleted == False)
+        elif account_status_filter == "deleted":
+            query = query.filter(Borrow.is_deleted == True)
+
+    return query
 
 @borrow_bp.route('/records', methods=['GET'])
+@read_replica
 @token_required
 def get_borrow_records(user_data):
     try:
-        now = datetime.now(timezone.utc).date()
-        
-        search_query = request.args.get('searchQuery', '')
-        status_filter = request.args.get('returnStatus', '')
-        account_status_filter = request.args.get('accountStatus', '')
-        search_by = request.args.get('searchBy', 'book')  
         page = request.args.get('page', 1, type=int)  
         limit = request.args.get('limit', 10, type=int)  
 
-        borrow_status_case = case(
-            (Borrow.return_date.isnot(None), literal_column("'Returned'")),
-            (Borrow.return_date.is_(None) & (Borrow.due_date < now), literal_column("'Overdue'")),
-            (Borrow.return_date.is_(None) & (Borrow.due_date >= now), literal_column("'Not Returned'")),
-            else_=literal_column("'Unknown'")
-        ).label('borrow_status_unique')  
-        
-        
-        query = db.session.query(
-            Borrow.id,
-            Borrow.borrow_date,
-            Borrow.due_date,
-            Borrow.return_date,
-            Borrow.status,
-            Borrow.is_deleted.label('user_is_deleted'),
-            borrow_status_case,
-            User.id.label('user_id'),
-            User.name.label('user_name'),
-            Borrow.user_name.label('borrow_user_name'),
-            Borrow.user_email.label('borrow_user_email'),
-            User.email.label('user_email'),
-            Book.id.label('book_id'),
-            Book.title.label('book_title'),
-            Book.author.label('book_author')
-        ).outerjoin(User, Borrow.user_id == User.id)\
-         .outerjoin(Book, Borrow.book_id == Book.id)
-
-        if search_query:
-            if search_by == 'book':
-                query = query.filter(Book.title.ilike(f'%{search_query}%'))
-
-            elif search_by == 'author':
-                query = query.filter(Book.author.ilike(f'%{search_query}%'))
-
-            elif search_by == 'borrower':
-                query = query.filter(
-                    Borrow.user_id.is_(None),
-                    Borrow.user_name.ilike(f"%{search_query}%")
-                ).union(
-                    query.filter(User.name.ilike(f'%{search_query}%'))
-                )
-
-            elif search_by == 'borrowerEmail':
-                query = query.filter(
-                    Borrow.user_id.is_(None),
-                    Borrow.user_email.ilike(f"%{search_query}%")
-                ).union(
-                    query.filter(User.email.ilike(f'%{search_query}%'))
-                )
+        query = build_borrow_records_query(request.args)
 
         
-        if status_filter:
-            status_filter = status_filter.lower()
-            if status_filter == "returned":
-                query = query.filter(
-                    Borrow.return_date.isnot(None)
-                )
-            elif status_filter == "overdue":
-                
-                query = query.filter(
-                    Borrow.return_date.is_(None),
-                    Borrow.due_date <= now
+        if cursor_requested(request.args):
+            try:
+                records, next_cursor = keyset_paginate(
+                    query, BORROW_SORT_KEY, get_cursor(request.args), limit, descending=True
                 )
-            elif status_filter == "not_returned":
-                
-                query = query.filter(
-                    Borrow.return_date.is_(None),
-                    Borrow.due_date > now
-                )
-
-        
-        if account_status_filter:
-            account_status_filter = account_status_filter.lower()
-            if account_status_filter == "active":
-                query = query.filter(Borrow.is_deleted == False)
-            elif account_status_filter == "deleted":
-                query = query.filter(Borrow.is_deleted == True)
-
-        
-        records = query.all()
-
-        
-        borrow_records = query.paginate(page=page, per_page=limit, error_out=False)
-        records = borrow_records.items
-        total_pages = borrow_records.pages
-
-        
-        result = []
-        for r in records:
-            user_id = r.user_id
-            user_name = None
-            user_email = None
-            account_status = None
-
-            
-            if user_id is None or r.user_id is None or r.user_is_deleted:
-                
-                user_name = r.borrow_user_name or "Deleted Account"
-                user_email = r.borrow_user_email or "Deleted Account"
-                account_status = "Deleted"
-            else:
-                
-                user_name = r.user_name
-                user_email = r.user_email
-                account_status = "Active"
-
-            
-            result.append({
-                "borrow_id": r.id,
-                "borrow_date": r.borrow_date,
-                "due_date": r.due_date,
-                "return_date": r.return_date,
-                "user_id": r.user_id,
-                "user_name": user_name,
-                "account_status": account_status,
-                "user_email": user_email,
-                "book_id": r.book_id,
-                "book_title": r.book_title,
-                "book_author": r.book_author,
-                "borrow_status": r.borrow_status_unique,  
-            })
+            except InvalidCursor:
+                return jsonify({"msg": "Invalid cursor"}), 400
+            page_info = {"nextCursor": next_cursor}
+        else:
+            records, _, page_info = offset_paginate(
+                query, BORROW_SORT_KEY, page, limit, descending=True,
+                count=page_counter('borrows', 'records', request.args)
+            )
 
         return jsonify({
-            "records": result,
-            "totalPages": total_pages
+            "records": [borrow_record_to_dict(r) for r in records],
+            **page_info
         })
 
     except Exception as e:
-        traceback.print_exc()  
+        logger.exception("Failed to fetch borrow records")
         return jsonify({"msg": "An error occurred while fetching borrow records."}), 500
 
+@borrow_bp.route('/records/export', methods=['GET'])
+@token_required
+def export_borrow_records(user_data):
+    # Every borrower's name, email and history in one download: admins only
+    if not is_admin(user_data):
+        return jsonify({"msg": "Admin only"}), 403
+
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"msg": "Unsupported format, use csv or ndjson"}), 400
+
+    query = order_by_key(build_borrow_records_query(request.args), BORROW_SORT_KEY, descending=True)\
+        .yield_per(current_app.config['EXPORT_YIELD_PER'])
+    rows = (borrow_record_to_dict(r) for r in query)
+    return export_response(rows, BORROW_EXPORT_FIELDS, fmt, 'borrow_records')
+
 
 @borrow_bp.route('/return', methods=['POST'])
 @token_required
@@ -362,35 +504,11 @@ def return_book(user_data):
     if not borrow_id:
         return jsonify({"msg": "Missing borrow_id"}), 400
 
-    borrow_record = Borrow.query.get(borrow_id)
-    if not borrow_record or borrow_record.user_id != user_data['id']:
-        return jsonify({"msg": "Borrow record not found or not authorized"}), 404
-
-    if borrow_record.return_date:
-        return jsonify({"msg": "Book already returned"}), 400
-
-    
-    return_date = datetime.now(timezone.utc).date()
-    borrow_record.return_date = return_date
-
-    
-    if borrow_record.due_date and return_date > borrow_record.due_date:
-        borrow_record.status = "Returned (Late)"
-    else:
-        borrow_record.status = "Returned"
-
-    
-    book = Book.query.get(borrow_record.book_id)
-    book.available = True
-
-    db.session.commit()
-
-    return jsonify({
-        "msg": f"Book '{book.title}' returned successfully",
-        "status": borrow_record.status
-    })
+    result, status = checkin_book(user_data['id'], borrow_id)
+    return jsonify(result), status
 
 @borrow_bp.route('/history', methods=['GET'])
+@read_replica
 @token_required
 def user_borrow_history(user_data):
     """
@@ -405,27 +523,27 @@ def user_borrow_history(user_data):
 
 
     
-    query = Borrow.query.join(Book).join(User)
     if not user_id:
         return jsonify({"error": "User not found"}), 404
 
-    
-    if user_id:
-        query = query.filter(Borrow.user_id == user_id)
-
-    if status == 'returned':
-        query = query.filter(Borrow.return_date.isnot(None))
-    elif status == 'not_returned':
-        query = query.filter(
-            Borrow.return_date.is_(None),  
-            Borrow.due_date >= datetime.now()  
-        )
-    elif status == 'overdue':
-        
-        query = query.filter(
-            Borrow.return_date.is_(None),  
-            Borrow.due_date <= datetime.now()  
-        )
+    # Every row belongs to this user, so read the name/email once instead of
+    # joining User (or lazy loading record.user) per row
+    user = db.session.execute(select(User.name, User.email).where(User.id == user_id)).first()
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    query = db.session.query(
+        Borrow.id,
+        Borrow.borrow_date,
+        Borrow.return_date,
+        Borrow.due_date,
+        Borrow.status,
+        Book.title.label('book_title'),
+        Book.author.label('book_author')
+    ).join(Book, Borrow.book_id == Book.id)\
+     .filter(Borrow.user_id == user_id)
+
+    query = filter_by_return_status(query, status)
 
     
     if search_query:
@@ -433,45 +551,29 @@ def user_borrow_history(user_data):
             query = query.filter(Book.title.ilike(f"%{search_query}%"))
         elif search_by == 'author':
             query = query.filter(Book.author.ilike(f"%{search_query}%"))
-        elif search_by == 'borrower':
-            query = query.filter(
-                (Borrow.user_id.is_(None) & Borrow.user_name.ilike(f"%{search_query}%")) |
-                (User.name.ilike(f'%{search_query}%'))
+        elif search_by in ('borrower', 'borrowerEmail'):
+            borrower = user.name if search_by == 'borrower' else user.email
+            if search_query.lower() not in borrower.lower():
+                query = query.filter(false())
+
+    if cursor_requested(request.args):
+        try:
+            borrow_history, next_cursor = keyset_paginate(
+                query, BORROW_SORT_KEY, get_cursor(request.args), limit, descending=True
             )
-        elif search_by == 'borrowerEmail':
-            query = query.filter(
-                (Borrow.user_id.is_(None) & Borrow.user_email.ilike(f"%{search_query}%")) |
-                (User.email.ilike(f'%{search_query}%'))
-            )
-
-    pagination = query.order_by(Borrow.borrow_date.desc()).paginate(page=page, per_page=limit, error_out=False)
-    borrow_history = pagination.items
+        except InvalidCursor:
+            return jsonify({"msg": "Invalid cursor"}), 400
+        page_info = {"nextCursor": next_cursor}
+    else:
+        pagination = order_by_key(query, BORROW_SORT_KEY, descending=True)\
+            .paginate(page=page, per_page=limit, error_out=False)
+        borrow_history = pagination.items
+        page_info = {"totalPages": pagination.pages, "currentPage": pagination.page}
 
 
-    result = []
-    for record in borrow_history:
-        
-        if record.return_date:
-            status = "Returned"
-        elif record.due_date < datetime.now().date() and record.return_date is None:  
-            status = "Overdue"
-        else:
-            status = "Not Returned"
-
-        result.append({
-            "borrow_id": record.id,
-            "user_name": record.user.name,
-            "user_email": record.user.email,
-            "book_title": record.book.title,
-            "book_author": record.book.author,
-            "borrow_date": record.borrow_date,
-            "return_date": record.return_date,
-            "due_date": record.due_date.strftime("%Y-%m-%d") if record.due_date else "N/A",
-            "status": status
-        })
+    result = [borrow_history_to_dict(record, user) for record in borrow_history]
 
     return jsonify({
     "history": result,
-    "totalPages": pagination.pages,
-    "currentPage": pagination.page,
+    **page_info
 }), 200
@@ -1,6 +1,17 @@
 from functools import wraps
 from flask import request, jsonify, current_app
 import jwt
+from utils.token_cache import ClaimsCache
+from services.revocation_service import is_revoked
+
+
+def get_claims_cache(app=None):
+    app = app or current_app
+    cache = app.extensions.get('claims_cache')
+    if cache is None:
+        cache = app.extensions['claims_cache'] = ClaimsCache(app.config.get('AUTH_CLAIMS_CACHE_SIZE', 4096))
+    return cache
+
 
 def token_required(f):
     @wraps(f)
@@ -13,12 +24,20 @@ def token_required(f):
         if not token:
             return jsonify({'error': 'Missing token'}), 401
 
-        try:
-            data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return jsonify({'error': 'Token expired'}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({'error': 'Invalid token'}), 401
+        cache = get_claims_cache()
+        data = cache.get(token)
+        if data is None:
+            try:
+                data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
+            except jwt.ExpiredSignatureError:
+                return jsonify({'error': 'Token expired'}), 401
+            except jwt.InvalidTokenError:
+                return jsonify({'error': 'Invalid token'}), 401
+            cache.put(token, data)
+
+        # Checked on cache hits too: a logout must end the session at once
+        if is_revoked(data):
+            return jsonify({'error': 'Token revoked'}), 401
 
         return f(data, *args, **kwargs)  
 
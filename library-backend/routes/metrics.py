@@ -0,0 +1,41 @@
+import hmac
+import ipaddress
+from flask import Blueprint, Response, abort, current_app, request
+from utils.metrics import get_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+def _scraper_allowed():
+    """
+    METRICS_TOKEN: the scraper sends "Authorization: Bearer <token>".
+    METRICS_ALLOWED_NETWORKS: comma separated CIDRs the scraper connects from.
+    Neither set: loopback only.
+    """
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        auth = request.headers.get('Authorization', '')
+        if hmac.compare_digest(auth.encode(), f"Bearer {token}".encode()):
+            return True
+
+    networks = current_app.config.get('METRICS_ALLOWED_NETWORKS', '')
+    if not networks and token:
+        return False
+    try:
+        client = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    if not networks:
+        return client.is_loopback
+    return any(client in ipaddress.ip_network(n.strip(), strict=False) for n in networks.split(',') if n.strip())
+
+
+@metrics_bp.route('', methods=['GET'])
+def export_metrics():
+    """📈 Prometheus scrape endpoint; route names and SQL counts are not for the public."""
+    metrics = get_metrics()
+    if metrics is None:
+        abort(404)
+    if not _scraper_allowed():
+        abort(403)
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -1,17 +1,26 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from models import db, User  
 from .decorator import token_required
-from routes.auth import register
 from services.auth_services import register_user
+from services.user_service import delete_users, demote_users, update_users, verify_users, parse_id_list
+from services.revocation_service import revoke_user_sessions
+from services.stats_service import bump
+from services.serializers import user_to_dict
+from services.read_models import user_summaries
 from services.mail_services import resend_verification_email
-from routes.books import Borrow
+from utils.db_routing import read_replica
+from utils.pagination import cursor_requested, get_cursor, keyset_paginate, offset_paginate, InvalidCursor
+from utils.page_counts import page_counter
 
 user_bp = Blueprint('user_management', __name__)  
 
+USER_SORT_KEY = (User.name, User.id)
+
 def is_admin(user_data):
     return user_data.get("is_admin") == 1
 
 @user_bp.route('', methods=['GET'])
+@read_replica
 @token_required
 def get_users(user_data):
     if not is_admin(user_data):
@@ -25,7 +34,7 @@ def get_users(user_data):
     limit = request.args.get('limit', 10, type=int)  
 
     
-    query = User.query
+    query = user_summaries()
 
     
     if search_query:
@@ -41,20 +50,20 @@ def get_users(user_data):
         query = query.filter(User.is_verified.is_(False))
 
         
-    users_query = query.paginate(page=page, per_page=limit, error_out=False)  
-
-    users = users_query.items  
-    total_pages = users_query.pages  
+    if cursor_requested(request.args):
+        try:
+            users, next_cursor = keyset_paginate(query, USER_SORT_KEY, get_cursor(request.args), limit)
+        except InvalidCursor:
+            return jsonify({"msg": "Invalid cursor"}), 400
+        page_info = {"nextCursor": next_cursor}
+    else:
+        users, _, page_info = offset_paginate(
+            query, USER_SORT_KEY, page, limit, count=page_counter('users', 'admin', request.args)
+        )
 
     return jsonify({
-            "users": [{
-                "id": u.id,
-                "name": u.name,
-                "email": u.email,
-                "is_admin": u.is_admin,
-                "email_verified": u.is_verified
-            } for u in users],
-            "totalPages": total_pages  
+            "users": [user_to_dict(u) for u in users],
+            **page_info
         })
 
 
@@ -76,13 +85,20 @@ def update_user(user_data, user_id):
     new_email = data.get("email")
     email_changed = False
     if new_email and new_email != user.email:
+        if user.is_verified:
+            bump(verified_users=-1, unverified_users=1)
         user.email = new_email
         user.is_verified = False  
         email_changed = True
 
+    was_admin = user.is_admin
     user.name = data.get("name", user.name)
     user.is_admin = data.get("is_admin", user.is_admin)
 
+    # Existing tokens carry the old email and admin flag
+    if email_changed or (was_admin and not user.is_admin):
+        revoke_user_sessions([user.id], 'account_change')
+
     db.session.commit()
 
     if email_changed:
@@ -96,35 +112,51 @@ def update_user(user_data, user_id):
 
     return jsonify({"msg": "User updated"})
 
-def update_borrow_history_with_user_info(user_id, user_name, user_email):
-    
-    borrow_records = Borrow.query.filter_by(user_id=user_id).all()
-    for borrow in borrow_records:
-        borrow.user_name = user_name
-        borrow.user_email = user_email
-    db.session.commit()
-
 @user_bp.route('/<int:user_id>', methods=['DELETE'])
 @token_required
 def delete_user(user_data, user_id):
     if not is_admin(user_data):
         return jsonify({"msg": "Admin only"}), 403
 
-    user = User.query.get(user_id)
-    if not user:
+    if not delete_users([user_id]):
+        db.session.rollback()
         return jsonify({"msg": "User not found"}), 404
+    db.session.commit()
 
-    
-    update_borrow_history_with_user_info(user_id, user.name, user.email)
+    return jsonify({"msg": "User deleted"})
 
-    
-    borrow_records = Borrow.query.filter_by(user_id=user_id).all()
-    for record in borrow_records:
-        record.is_deleted = True
-    db.session.delete(user)
+
+# action -> (function applied to the id list, past-tense verb for the response)
+BULK_USER_ACTIONS = {
+    'delete': (delete_users, "deleted"),
+    'verify': (verify_users, "verified"),
+    'promote': (lambda ids: update_users(ids, is_admin=True), "promoted"),
+    'demote': (demote_users, "demoted"),
+}
+
+
+@user_bp.route('/bulk/<action>', methods=['POST'])
+@token_required
+def bulk_update_users(user_data, action):
+    """
+    👥 Delete / verify / promote / demote many users at once: {"ids": [1, 2, 3]}.
+    Runs as set-based UPDATE/DELETE statements in a single transaction.
+    """
+    if not is_admin(user_data):
+        return jsonify({"msg": "Admin only"}), 403
+    if action not in BULK_USER_ACTIONS:
+        return jsonify({"msg": f"Unknown action, use one of: {', '.join(BULK_USER_ACTIONS)}"}), 404
+
+    try:
+        ids = parse_id_list(request.get_json(silent=True), current_app.config['BULK_ADMIN_MAX_IDS'])
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    apply, verb = BULK_USER_ACTIONS[action]
+    count = apply(ids)
     db.session.commit()
 
-    return jsonify({"msg": "User deleted"})
+    return jsonify({"msg": f"{count} user(s) {verb}", "count": count, "requested": len(ids)})
 
 
 @user_bp.route('', methods=['POST'])
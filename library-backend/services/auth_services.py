@@ -1,12 +1,15 @@
 from flask import request, make_response, jsonify, current_app
-from routes.auth import auth_bp
 from models import User, db
-from flask_mail import Message
-from extensions import bcrypt, mail
-from utils.utils import generate_auth_token, generate_email_verification_token
+from services.password_service import hash_password, check_password, needs_rehash, HasherBusy
+from utils.utils import generate_auth_token, generate_email_verification_token, AUTH_TOKEN_LIFETIME, REMEMBER_ME_TOKEN_LIFETIME
 import jwt
 from datetime import datetime, timezone
 from services.mail_services import resend_verification_email
+from services.stats_service import bump
+from services.revocation_service import revoke_session, revoke_user_sessions
+import logging
+
+logger = logging.getLogger(__name__)
 
 def register_user(name, email, password, is_admin=False, send_verification=True):
     try:
@@ -24,31 +27,39 @@ def register_user(name, email, password, is_admin=False, send_verification=True)
         return {"error": str(e)}, 500
 
     try:
-        hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
+        hashed_password = hash_password(password)
 
         new_user = User(name=name, email=email, password=hashed_password, is_admin=is_admin)
         db.session.add(new_user)
-        print("1`")
+        bump(unverified_users=1)
         db.session.commit()
         if send_verification:
-            print("2`")
             resend_verification_email(email)
         return {"message": "Registration successful! Please check your email for verification."}, 201
+    except HasherBusy:
+        return {"error": "Server is busy, please try again shortly"}, 503
     except Exception as e:
-        print("3`")
+        logger.exception("Registration failed")
         return {"error": str(e)}, 500
     
 def login_user(email, password, remember_me):
     user = User.query.filter_by(email=email).first()
 
-    if not user or not bcrypt.check_password_hash(user.password, password):
-        return {"error": "Invalid credentials"}, 401
+    try:
+        if not user or not check_password(user.password, password):
+            return {"error": "Invalid credentials"}, 401
+
+        if not user.is_verified:
+            return {"error": "Please verify your email before logging in"}, 403
 
-    if not user.is_verified:
-        return {"error": "Please verify your email before logging in"}, 403
+        if needs_rehash(user.password):
+            user.password = hash_password(password)
+            db.session.commit()
+    except HasherBusy:
+        return {"error": "Server is busy, please try again shortly"}, 503
 
     token = generate_auth_token(user.email, remember_me)
-    max_age = 7 * 24 * 60 * 60 if remember_me else 30 * 60  
+    max_age = int((REMEMBER_ME_TOKEN_LIFETIME if remember_me else AUTH_TOKEN_LIFETIME).total_seconds())
 
     response = make_response({
         "message": "Login successful!",
@@ -66,6 +77,18 @@ def login_user(email, password, remember_me):
 
     return response, 200
 
+def logout_user(claims, everywhere=False):
+    """Revoke this token, or with `everywhere` every session of the user, and drop the cookie."""
+    if everywhere:
+        revoke_user_sessions([claims['id']], 'logout_all')
+    else:
+        revoke_session(claims, 'logout')
+    db.session.commit()
+
+    response = make_response({"message": "Logged out"})
+    response.delete_cookie('token', path='/', samesite='Lax')
+    return response, 200
+
 def handle_reset_password(token, new_password):
     try:
         payload = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
@@ -81,9 +104,11 @@ def handle_reset_password(token, new_password):
         if user.reset_token_expiry and datetime.now(timezone.utc) > user.reset_token_expiry.replace(tzinfo=timezone.utc):
             return {"error": "Token expired. Please request a new reset link."}, 401
 
-        user.password = bcrypt.generate_password_hash(new_password).decode('utf-8')
+        user.password = hash_password(new_password)
         user.reset_token = None
         user.reset_token_expiry = None
+        # Whoever knew the old password may still hold a session
+        revoke_user_sessions([user.id], 'password_reset')
         db.session.commit()
         return {"message": "Password reset successful. You can now log in."}, 200
 
@@ -91,5 +116,7 @@ def handle_reset_password(token, new_password):
         return {"error": "Token has expired."}, 400
     except jwt.InvalidTokenError:
         return {"error": "Invalid token."}, 400
+    except HasherBusy:
+        return {"error": "Server is busy, please try again shortly"}, 503
     except Exception as e:
         return {"error": "Something went wrong. Try again."}, 500
\ No newline at end of file
@@ -0,0 +1,191 @@
+from collections import defaultdict
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import select, update
+from services.outbox_service import enqueue_email
+from services.stats_service import bump
+from utils.response_cache import catalog_changed
+from models import db, Borrow, Book, User, BorrowStatus
+
+
+def display_status(status):
+    """Status shown to clients: late returns are still just "Returned"."""
+    if status in BorrowStatus.CLOSED:
+        return BorrowStatus.RETURNED
+    return status
+
+
+def filter_by_return_status(query, return_status):
+    """Apply the returned / overdue / not_returned filter as a lookup on Borrow.status."""
+    if not return_status:
+        return query
+    return_status = return_status.lower()
+    if return_status == 'returned':
+        return query.filter(Borrow.status.in_(BorrowStatus.CLOSED))
+    if return_status == 'overdue':
+        return query.filter(Borrow.status == BorrowStatus.OVERDUE)
+    if return_status == 'not_returned':
+        return query.filter(Borrow.status == BorrowStatus.NOT_RETURNED)
+    return query
+
+
+LOAN_PERIOD = timedelta(days=14)
+
+
+def checkout_book(user_id, book_id):
+    """
+    📕 Borrow a copy of a book without locking the table.
+    Taking a copy is a guarded decrement (available_copies - 1 only while it is
+    above zero) committed together with the loan row, so concurrent requests
+    can never hand out more copies than are on the shelf.
+    """
+    book = db.session.execute(
+        select(Book.title, Book.available_copies).where(Book.id == book_id, Book.is_deleted == False)
+    ).first()
+    if not book:
+        return {"message": "Book not found"}, 404
+    if book.available_copies <= 0:
+        return {"message": "Book is not available"}, 400
+    already = db.session.execute(
+        select(Borrow.id).where(Borrow.user_id == user_id, Borrow.book_id == book_id,
+                                Borrow.status.in_(BorrowStatus.OPEN)).limit(1)
+    ).first()
+    if already:
+        return {"message": "You already have a copy of this book"}, 400
+
+    claimed = db.session.execute(
+        update(Book)
+        .where(Book.id == book_id, Book.available_copies > 0, Book.is_deleted == False)
+        .values(available_copies=Book.available_copies - 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        db.session.rollback()
+        return {"message": "Someone else just borrowed the last copy"}, 409
+
+    borrow_date = datetime.now(timezone.utc)
+    due_date = borrow_date + LOAN_PERIOD
+    db.session.add(Borrow(
+        user_id=user_id,
+        book_id=book_id,
+        borrow_date=borrow_date,
+        due_date=due_date,
+        status=BorrowStatus.NOT_RETURNED
+    ))
+    bump(active_loans=1)
+    db.session.commit()
+    catalog_changed()
+
+    return {
+        "message": f"You have borrowed '{book.title}'.",
+        "due_date": due_date.strftime("%Y-%m-%d")
+    }, 200
+
+
+def checkin_book(user_id, borrow_id):
+    """Return a loan; closing the loan is a compare-and-set on return_date IS NULL, then the copy goes back on the shelf."""
+    record = db.session.execute(
+        select(Borrow.user_id, Borrow.book_id, Borrow.due_date, Borrow.return_date, Borrow.status)
+        .where(Borrow.id == borrow_id)
+    ).first()
+    if not record or record.user_id != user_id:
+        return {"msg": "Borrow record not found or not authorized"}, 404
+    if record.return_date:
+        return {"msg": "Book already returned"}, 400
+
+    return_date = datetime.now(timezone.utc).date()
+    if record.due_date and return_date > record.due_date:
+        status = BorrowStatus.RETURNED_LATE
+    else:
+        status = BorrowStatus.RETURNED
+
+    closed = db.session.execute(
+        update(Borrow)
+        .where(Borrow.id == borrow_id, Borrow.user_id == user_id, Borrow.return_date.is_(None))
+        .values(return_date=return_date, status=status)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not closed:
+        db.session.rollback()
+        return {"msg": "Book already returned"}, 409
+
+    # Capped at total_copies in case copies were taken out of circulation meanwhile;
+    # a withdrawn book keeps the copy off the shelf
+    db.session.execute(
+        update(Book)
+        .where(Book.id == record.book_id, Book.available_copies < Book.total_copies)
+        .values(available_copies=Book.copies_back_on_shelf(1))
+        .execution_options(synchronize_session=False)
+    )
+    title = db.session.execute(select(Book.title).where(Book.id == record.book_id)).scalar()
+    bump(active_loans=-1, overdue_loans=-1 if record.status == BorrowStatus.OVERDUE else 0)
+    db.session.commit()
+    catalog_changed()
+
+    return {
+        "msg": f"Book '{title}' returned successfully",
+        "status": status
+    }, 200
+
+
+def sweep_overdue(batch_size=1000, today=None, notify=True):
+    """
+    ⏰ Move open loans past their due date from "Not Returned" to "Overdue".
+    Works in batches of `batch_size` rows, one UPDATE and one commit per batch,
+    and (optionally) queues one reminder per affected borrower per batch.
+    Returns the number of loans marked overdue.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    total = 0
+
+    while True:
+        ids = db.session.execute(
+            select(Borrow.id)
+            .where(Borrow.status == BorrowStatus.NOT_RETURNED, Borrow.due_date < today)
+            .order_by(Borrow.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+
+        # Re-check the status so a loan returned since the SELECT is left alone
+        marked = db.session.execute(
+            update(Borrow)
+            .where(Borrow.id.in_(ids), Borrow.status == BorrowStatus.NOT_RETURNED)
+            .values(status=BorrowStatus.OVERDUE)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        bump(overdue_loans=marked)
+        if notify:
+            queue_overdue_reminders(ids)
+        # Status change and reminders land together or not at all
+        db.session.commit()
+        total += marked
+
+    return total
+
+
+def queue_overdue_reminders(borrow_ids):
+    """Queue one reminder per borrower covering all of their loans in `borrow_ids`."""
+    rows = db.session.execute(
+        select(User.name, User.email, Book.title, Borrow.due_date)
+        .join(User, Borrow.user_id == User.id)
+        .join(Book, Borrow.book_id == Book.id)
+        .where(Borrow.id.in_(borrow_ids), Borrow.status == BorrowStatus.OVERDUE)
+    ).all()
+
+    loans_by_user = defaultdict(list)
+    for name, email, title, due_date in rows:
+        loans_by_user[(name, email)].append((title, due_date))
+
+    if not loans_by_user:
+        return 0
+
+    for (name, email), loans in loans_by_user.items():
+        lines = "\n".join(f"  - {title} (due {due_date:%Y-%m-%d})" for title, due_date in loans)
+        enqueue_email(
+            subject="Overdue library books",
+            recipients=[email],
+            body=f"Hello {name},\n\nThe following books are overdue:\n{lines}\n\nPlease return them as soon as possible."
+        )
+
+    return len(loans_by_user)
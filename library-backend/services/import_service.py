@@ -0,0 +1,190 @@
+import codecs
+import csv
+import json
+from sqlalchemy import bindparam, insert, select, update
+from models import db, Book
+from services.stats_service import bump
+
+TRUE_VALUES = {'true', '1', 'yes', 'y'}
+FALSE_VALUES = {'false', '0', 'no', 'n'}
+
+TITLE_MAX = Book.__table__.c.title.type.length
+AUTHOR_MAX = Book.__table__.c.author.type.length
+
+
+class RowError(ValueError):
+    pass
+
+
+def _parse_bool(value, default=True):
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise RowError(f"Invalid boolean for 'available': {value!r}")
+
+
+def _parse_copies(value):
+    if value is None or value == '':
+        return 1
+    try:
+        copies = int(value)
+    except (TypeError, ValueError):
+        raise RowError(f"Invalid number for 'copies': {value!r}")
+    if isinstance(value, bool) or copies < 1:
+        raise RowError("copies must be at least 1")
+    return copies
+
+
+def validate_book_row(record):
+    """Turn one parsed CSV/JSON record into Book column values, or raise RowError."""
+    if not isinstance(record, dict):
+        raise RowError("Expected an object with title and author")
+
+    title = record.get('title') or ''
+    author = record.get('author') or ''
+    if not isinstance(title, str) or not isinstance(author, str):
+        raise RowError("title and author must be strings")
+    title, author = title.strip(), author.strip()
+    if not title or not author:
+        raise RowError("Missing required fields: title and author")
+    if len(title) > TITLE_MAX:
+        raise RowError(f"title is longer than {TITLE_MAX} characters")
+    if len(author) > AUTHOR_MAX:
+        raise RowError(f"author is longer than {AUTHOR_MAX} characters")
+
+    copies = _parse_copies(record.get('copies'))
+    return {
+        "title": title,
+        "author": author,
+        "total_copies": copies,
+        "available_copies": copies if _parse_bool(record.get('available')) else 0,
+        "is_deleted": False,
+    }
+
+
+def iter_csv_records(stream):
+    """Yield (row_number, record) from a binary CSV stream, one line at a time."""
+    lines = codecs.iterdecode(stream, 'utf-8-sig')
+    reader = csv.DictReader(lines)
+    for row_number, record in enumerate(reader, start=1):
+        if None in record:
+            yield row_number, RowError("Too many columns")
+        else:
+            yield row_number, record
+
+
+def iter_jsonl_records(stream):
+    """Yield (row_number, record) from a binary JSON Lines stream, skipping blank lines."""
+    row_number = 0
+    for line in codecs.iterdecode(stream, 'utf-8-sig'):
+        for part in line.splitlines():
+            if not part.strip():
+                continue
+            row_number += 1
+            try:
+                yield row_number, json.loads(part)
+            except ValueError as e:
+                yield row_number, RowError(f"Invalid JSON: {e}")
+
+
+_add_copies = (
+    update(Book.__table__)
+    .where(Book.__table__.c.id == bindparam('b_id'))
+    .values(total_copies=Book.__table__.c.total_copies + bindparam('b_total'),
+            available_copies=Book.copies_back_on_shelf(bindparam('b_on_shelf')))
+)
+
+
+def _write_batch(batch):
+    """
+    Same rule as add_book: a title and author already in the catalog (or
+    repeated within the batch) gets the copies added to its row instead of a
+    duplicate row. One SELECT, one executemany UPDATE and one INSERT per batch.
+    Returns (inserted, merged) row counts.
+    """
+    grouped = {}
+    for row in batch:
+        key = (row["title"], row["author"])
+        if key in grouped:
+            grouped[key]["total_copies"] += row["total_copies"]
+            grouped[key]["available_copies"] += row["available_copies"]
+        else:
+            grouped[key] = dict(row)
+
+    existing = {}
+    for book_id, title, author in db.session.execute(
+        select(Book.id, Book.title, Book.author)
+        .where(Book.title.in_(sorted({title for title, _ in grouped})), Book.is_deleted == False)
+        .order_by(Book.id)
+    ):
+        existing.setdefault((title, author), book_id)
+
+    updates = [
+        {"b_id": existing[key], "b_total": row["total_copies"], "b_on_shelf": row["available_copies"]}
+        for key, row in grouped.items() if key in existing
+    ]
+    new_rows = [row for key, row in grouped.items() if key not in existing]
+    if updates:
+        db.session.execute(_add_copies, updates)
+    if new_rows:
+        db.session.execute(insert(Book), new_rows)
+        bump(books=len(new_rows))
+    return len(new_rows), len(batch) - len(new_rows)
+
+
+def import_books(records, batch_size=1000, max_errors=1000):
+    """
+    📚 Insert books from an iterable of (row_number, record) pairs.
+
+    Rows are validated as they arrive and written with one commit per
+    `batch_size` rows, so memory stays bounded by the batch size no matter how
+    large the upload is. Rows for a book already in the catalog add copies to
+    it ("merged") rather than inserting a duplicate. Invalid rows are skipped
+    and reported; at most `max_errors` errors are listed in the report.
+    """
+    report = {"inserted": 0, "merged": 0, "failed": 0, "errors": [], "errorsTruncated": False}
+    batch, batch_rows = [], []
+
+    def add_error(row_number, message):
+        report["failed"] += 1
+        if len(report["errors"]) < max_errors:
+            report["errors"].append({"row": row_number, "error": message})
+        else:
+            report["errorsTruncated"] = True
+
+    def flush():
+        if not batch:
+            return
+        try:
+            inserted, merged = _write_batch(batch)
+            db.session.commit()
+            report["inserted"] += inserted
+            report["merged"] += merged
+        except Exception as e:
+            db.session.rollback()
+            for row_number in batch_rows:
+                add_error(row_number, f"Batch insert failed: {e.__class__.__name__}")
+        batch.clear()
+        batch_rows.clear()
+
+    for row_number, record in records:
+        try:
+            if isinstance(record, RowError):
+                raise record
+            batch.append(validate_book_row(record))
+            batch_rows.append(row_number)
+        except RowError as e:
+            add_error(row_number, str(e))
+            continue
+
+        if len(batch) >= batch_size:
+            flush()
+
+    flush()
+    return report
@@ -1,14 +1,13 @@
-import os
 from flask import current_app
-from flask_mail import Message
 from models import User, db
 from utils.utils import generate_reset_token, generate_email_verification_token
-from extensions import mail
+from services.outbox_service import enqueue_email
+from services.stats_service import bump
 from datetime import datetime, timezone,timedelta
 import jwt
-from dotenv import load_dotenv 
+import logging
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
 def handle_forgot_password(email):
     user = User.query.filter_by(email=email).first()
@@ -19,13 +18,11 @@ def handle_forgot_password(email):
     BACKEND_URL = current_app.config.get("BACKEND_URL")
     reset_link = f'{BACKEND_URL}/reset-password?token={token}'
 
-    msg = Message(
+    enqueue_email(
         subject="Reset Your Password",
         recipients=[email],
         body=f"Hello {user.name},\n\nClick the link below to reset your password:\n{reset_link}\n\nThis link will expire in 15 minutes."
     )
-
-    mail.send(msg)
     user.reset_token = token
     user.reset_token_expiry = datetime.now(timezone.utc) + timedelta(minutes=15)
     db.session.commit()
@@ -36,46 +33,31 @@ def resend_verification_email(email):
     user = User.query.filter_by(email=email).first()
 
     if not user:
-        print("User not found")
         return {"error": "User not found"}, 404
 
     if user.is_verified:
-        print("User is already verified")
         return {"message": "Your account is already verified"}, 200
 
     try:
-        print("Generating verification token")
         token = generate_email_verification_token(email)
-        print("Token generated successfully")
-        print(os.getenv("BACKEND_URL"))
-        print(os.getenv("BACKEND_URL"))
         if not token:
-            print("Failed to generate verification token")
+            logger.error("Failed to generate a verification token for user %s", user.id)
             return {"error": "Failed to generate verification token"}, 500
-        print(f"Token: {token}")
 
         verification_link = f'{current_app.config["BACKEND_URL"]}/api/verify-email?token={token}'
 
-        print(f"Verification link: {verification_link}")
-        msg = Message(
+        enqueue_email(
             subject="Verify Your Email",
             recipients=[email],
             body=f"Hello {user.name},\n\nPlease verify your email using this link: {verification_link}\n\nThis link will expire in 15 minutes."
         )
-
-        print(f"mail:{mail}")
-        try:
-            print("Sending verification email")
-            mail.send(msg)
-            print("Verification email sent successfully")
-        except Exception as mail_error:
-            print(f"Failed to send verification email: {str(mail_error)}")
-            return {"error": "Failed to send verification email"}, 500
-        print("Verification email resent successfully")
+        db.session.commit()
+        logger.info("Verification email queued for user %s", user.id)
         return {"message": "Verification email resent successfully."}, 200
 
 
     except Exception as e:
+        logger.exception("Could not queue the verification email for user %s", user.id)
         return {"error": str(e)}, 500
 
 def verify_email_token(token):
@@ -95,6 +77,7 @@ def verify_email_token(token):
             return None, "InvalidOrExpiredToken"
 
         user.is_verified = True
+        bump(verified_users=1, unverified_users=-1)
         db.session.commit()
 
         return email, None  
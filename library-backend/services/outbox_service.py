@@ -0,0 +1,131 @@
+import logging
+from datetime import datetime, timedelta
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy import select, update
+from extensions import mail
+from models import db, OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_DELAY = timedelta(hours=6)
+
+
+def _mailer():
+    # Only the worker sends mail, so the SMTP settings are read on the first drain
+    app = current_app._get_current_object()
+    if 'mail' not in app.extensions:
+        mail.init_app(app)
+    return mail
+
+
+def _utcnow():
+    # Stored naive, like every other DateTime column in the schema
+    return datetime.utcnow()
+
+
+def enqueue_email(subject, recipients, body):
+    """
+    📮 Queue an email for the outbox worker.
+    The row is only added to the session; it is written by the caller's commit,
+    so the mail goes out if and only if the surrounding change is committed.
+    """
+    if isinstance(recipients, str):
+        recipients = [recipients]
+    email = OutboxEmail(
+        subject=subject,
+        recipients=",".join(recipients),
+        body=body,
+        status=OutboxEmail.PENDING,
+        attempts=0,
+        next_attempt_at=_utcnow(),
+    )
+    db.session.add(email)
+    return email
+
+
+def retry_delay(attempts):
+    base = current_app.config.get('OUTBOX_RETRY_BASE_SECONDS', 30)
+    return min(timedelta(seconds=base * 2 ** (attempts - 1)), MAX_RETRY_DELAY)
+
+
+def _claim_batch(batch_size):
+    query = (
+        select(OutboxEmail)
+        .where(OutboxEmail.status == OutboxEmail.PENDING, OutboxEmail.next_attempt_at <= _utcnow())
+        .order_by(OutboxEmail.id)
+        .limit(batch_size)
+    )
+    # Lets several workers drain the same table (ignored by SQLite)
+    query = query.with_for_update(skip_locked=True)
+    return db.session.execute(query).scalars().all()
+
+
+def _record_failure(email, error, max_attempts):
+    email.attempts += 1
+    email.last_error = str(error)[:2000]
+    if email.attempts >= max_attempts:
+        email.status = OutboxEmail.DEAD
+        logger.error("Outbox email %s dead-lettered after %s attempts", email.id, email.attempts)
+    else:
+        email.next_attempt_at = _utcnow() + retry_delay(email.attempts)
+
+
+def drain_outbox(batch_size=None, max_attempts=None):
+    """
+    Send one batch of due emails over a single SMTP connection.
+    Failed sends are retried with exponential backoff and dead-lettered after
+    `max_attempts`. Returns (sent, failed) for the batch.
+    """
+    batch_size = batch_size or current_app.config.get('OUTBOX_BATCH_SIZE', 50)
+    max_attempts = max_attempts or current_app.config.get('OUTBOX_MAX_ATTEMPTS', 6)
+
+    emails = _claim_batch(batch_size)
+    if not emails:
+        db.session.rollback()
+        return 0, 0
+
+    sent = failed = 0
+    handled = set()
+    try:
+        with _mailer().connect() as conn:
+            for email in emails:
+                msg = Message(
+                    subject=email.subject,
+                    recipients=email.recipients.split(","),
+                    body=email.body
+                )
+                handled.add(email.id)
+                try:
+                    conn.send(msg)
+                except Exception as e:
+                    logger.warning("Outbox email %s failed: %s", email.id, e)
+                    _record_failure(email, e, max_attempts)
+                    failed += 1
+                else:
+                    email.status = OutboxEmail.SENT
+                    email.attempts += 1
+                    email.sent_at = _utcnow()
+                    email.last_error = None
+                    sent += 1
+    except Exception as e:
+        # Connecting (or closing) failed: every email not yet sent counts as an attempt
+        logger.warning("Outbox SMTP connection failed: %s", e)
+        for email in emails:
+            if email.id not in handled:
+                _record_failure(email, e, max_attempts)
+                failed += 1
+
+    db.session.commit()
+    return sent, failed
+
+
+def requeue_dead():
+    """Give dead-lettered emails a fresh set of attempts."""
+    result = db.session.execute(
+        update(OutboxEmail)
+        .where(OutboxEmail.status == OutboxEmail.DEAD)
+        .values(status=OutboxEmail.PENDING, attempts=0, next_attempt_at=_utcnow())
+    )
+    db.session.commit()
+    return result.rowcount
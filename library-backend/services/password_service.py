@@ -0,0 +1,89 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import bcrypt
+from flask import current_app
+
+# bcrypt hashing is dispatched to a small process pool so a burst of logins
+# doesn't hold request threads on CPU-bound work. PASSWORD_HASH_WORKERS=0 runs
+# it inline instead.
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+class HasherBusy(Exception):
+    """Raised when more hashes are queued than PASSWORD_HASH_MAX_PENDING allows."""
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check(pw_hash, password):
+    return bcrypt.checkpw(password, pw_hash)
+
+
+def _get_executor(config):
+    global _executor, _slots
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                # spawn: forking a process that already runs request threads is unsafe
+                _executor = ProcessPoolExecutor(
+                    max_workers=config['PASSWORD_HASH_WORKERS'],
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                _slots = threading.BoundedSemaphore(config['PASSWORD_HASH_MAX_PENDING'])
+    return _executor
+
+
+def shutdown_pool():
+    global _executor, _slots
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+        _executor = None
+        _slots = None
+
+
+def _run(fn, *args):
+    config = current_app.config
+    if not config.get('PASSWORD_HASH_WORKERS'):
+        return fn(*args)
+
+    executor = _get_executor(config)
+    slots = _slots
+    if not slots.acquire(blocking=False):
+        raise HasherBusy("Too many password operations in progress")
+    try:
+        future = executor.submit(fn, *args)
+    except Exception:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future.result(timeout=config.get('PASSWORD_HASH_TIMEOUT', 10))
+
+
+def hash_password(password):
+    rounds = current_app.config.get('BCRYPT_LOG_ROUNDS', 12)
+    return _run(_hash, password.encode('utf-8'), rounds)
+
+
+def check_password(pw_hash, password):
+    if not pw_hash:
+        return False
+    return _run(_check, pw_hash.encode('utf-8'), password.encode('utf-8'))
+
+
+def hash_rounds(pw_hash):
+    # bcrypt hashes look like $2b$12$<salt+digest>
+    try:
+        return int(pw_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def needs_rehash(pw_hash):
+    return hash_rounds(pw_hash) != current_app.config.get('BCRYPT_LOG_ROUNDS', 12)
@@ -0,0 +1,46 @@
+"""
+📇 Read models for the list endpoints.
+
+Column-only queries whose rows come back as namedtuples: no ORM entities, no
+identity map bookkeeping, no relationship proxies such as Book.borrowers.
+They are read-only by construction; anything that changes a book or a user
+still loads the mapped class.
+"""
+from collections import namedtuple
+from sqlalchemy.orm import Bundle
+from models import db, Book, User
+from services.serializers import BOOK_FIELDS
+
+USER_FIELDS = ("id", "name", "email", "is_admin", "is_verified")
+
+BookSummary = namedtuple("BookSummary", BOOK_FIELDS)
+UserSummary = namedtuple("UserSummary", USER_FIELDS)
+
+
+class SummaryBundle(Bundle):
+    """Builds each result row straight into `dto`, a namedtuple with one field per column."""
+
+    def __init__(self, dto, *columns):
+        super().__init__(dto.__name__, *columns, single_entity=True)
+        self.dto = dto
+
+    def create_row_processor(self, query, procs, labels):
+        make = self.dto._make
+
+        def proc(row):
+            return make([p(row) for p in procs])
+        return proc
+
+
+BOOK_SUMMARY = SummaryBundle(BookSummary, *(getattr(Book, field) for field in BOOK_FIELDS))
+USER_SUMMARY = SummaryBundle(UserSummary, *(getattr(User, field) for field in USER_FIELDS))
+
+
+def book_summaries():
+    """Query of BookSummary rows; filter, order and paginate it like Book.query."""
+    return db.session.query(BOOK_SUMMARY)
+
+
+def user_summaries():
+    """Query of UserSummary rows."""
+    return db.session.query(USER_SUMMARY)
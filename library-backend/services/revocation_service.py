@@ -0,0 +1,177 @@
+"""
+🚫 Server-side revocation for the stateless login tokens.
+
+Every token carries the user's token_generation ("gen") and its own id
+("jti"). Revoking bumps the generation, which retires all of a user's tokens,
+or records a single jti, and appends a row to token_revocation in the
+caller's transaction.
+
+Workers keep the log in memory (utils/revocation_list.py) so token_required
+checks it without a query. The worker that commits a revocation applies it at
+once; the others pick up new rows within REVOCATION_REFRESH_SECONDS, reading
+only what was added since their last refresh.
+"""
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from flask import current_app, has_app_context
+from sqlalchemy import delete, event, insert, select, update
+from models import db, User, TokenRevocation
+from utils.db_routing import RoutingSession
+from utils.revocation_list import RevocationList
+from utils.utils import REMEMBER_ME_TOKEN_LIFETIME
+
+logger = logging.getLogger(__name__)
+
+# Rows committed while another worker was refreshing can carry a slightly
+# older created_at than its refresh; re-reading this much again catches them
+SYNC_OVERLAP = timedelta(seconds=30)
+PRUNE_INTERVAL = 3600
+PENDING_KEY = 'pending_revocations'
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _epoch(value):
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def get_revocation_list(app=None):
+    app = app or current_app
+    revocations = app.extensions.get('revocation_list')
+    if revocations is None:
+        revocations = app.extensions['revocation_list'] = RevocationList()
+    return revocations
+
+
+def _apply(revocations, user_id, generation, jti, expires_at):
+    if jti:
+        revocations.revoke_token(jti, expires_at)
+    else:
+        revocations.revoke_user(user_id, generation, expires_at)
+
+
+def sync_revocations(app=None, force=False):
+    """
+    Bring this worker's list up to date, at most every REVOCATION_REFRESH_SECONDS.
+    Only the first load makes concurrent requests wait; later refreshes are
+    done by whichever request gets there first while the others carry on.
+    """
+    app = app or current_app
+    revocations = get_revocation_list(app)
+    if not force and time.monotonic() < revocations.next_sync:
+        return revocations
+
+    first_load = revocations.synced_through is None
+    if not revocations.sync_lock.acquire(blocking=first_load or force):
+        return revocations
+    try:
+        if not force and time.monotonic() < revocations.next_sync:
+            return revocations
+        started = _utcnow()
+        query = (
+            select(TokenRevocation.user_id, TokenRevocation.generation, TokenRevocation.jti, TokenRevocation.expires_at)
+            .where(TokenRevocation.expires_at > started)
+        )
+        if not first_load:
+            query = query.where(TokenRevocation.created_at >= revocations.synced_through - SYNC_OVERLAP)
+        # Always the primary: a lagging replica would hide fresh revocations
+        with db.engine.connect() as conn:
+            rows = conn.execute(query).all()
+        for user_id, generation, jti, expires_at in rows:
+            _apply(revocations, user_id, generation, jti, _epoch(expires_at))
+        revocations.synced_through = started
+
+        if time.monotonic() >= revocations.next_prune:
+            revocations.prune()
+            revocations.next_prune = time.monotonic() + PRUNE_INTERVAL
+    except Exception as e:
+        # Same trade-off as the rate limiter: a database hiccup must not log everybody out
+        logger.warning("Could not refresh the revocation list: %s", e)
+    finally:
+        revocations.next_sync = time.monotonic() + app.config.get('REVOCATION_REFRESH_SECONDS', 5)
+        revocations.sync_lock.release()
+    return revocations
+
+
+def is_revoked(claims):
+    """True when the verified `claims` belong to a revoked token. No query outside the periodic refresh."""
+    return sync_revocations().is_revoked(claims)
+
+
+def _record(rows):
+    db.session.execute(insert(TokenRevocation), rows)
+    db.session.info.setdefault(PENDING_KEY, []).extend(
+        (row['user_id'], row['generation'], row['jti'], _epoch(row['expires_at'])) for row in rows
+    )
+
+
+def revoke_user_sessions(user_ids, reason):
+    """
+    Revoke every token issued so far to `user_ids` (password reset, logout
+    everywhere, account deleted...). Tokens issued afterwards carry the new
+    generation and stay valid. The caller commits.
+    Returns the number of users affected.
+    """
+    if not user_ids:
+        return 0
+    db.session.execute(
+        update(User).where(User.id.in_(user_ids))
+        .values(token_generation=User.token_generation + 1)
+        .execution_options(synchronize_session=False)
+    )
+    generations = db.session.execute(select(User.id, User.token_generation).where(User.id.in_(user_ids))).all()
+    if not generations:
+        return 0
+
+    now = _utcnow()
+    # Older tokens are all expired by then, so the row is no longer needed
+    expires_at = now + REMEMBER_ME_TOKEN_LIFETIME
+    _record([
+        {"user_id": user_id, "generation": generation, "jti": None,
+         "reason": reason, "created_at": now, "expires_at": expires_at}
+        for user_id, generation in generations
+    ])
+    return len(generations)
+
+
+def revoke_session(claims, reason='logout'):
+    """Revoke the single token behind `claims`; the caller commits."""
+    jti = claims.get('jti')
+    if not jti:
+        # Issued before tokens had an id: only the generation can retire it
+        return revoke_user_sessions([claims['id']], reason)
+
+    now = _utcnow()
+    exp = claims.get('exp')
+    expires_at = (datetime.fromtimestamp(exp, timezone.utc).replace(tzinfo=None)
+                  if exp else now + REMEMBER_ME_TOKEN_LIFETIME)
+    _record([{"user_id": claims['id'], "generation": None, "jti": jti,
+              "reason": reason, "created_at": now, "expires_at": expires_at}])
+    return 1
+
+
+def prune_revocations():
+    """Delete log rows whose tokens have all expired. Returns the number deleted."""
+    deleted = db.session.execute(
+        delete(TokenRevocation).where(TokenRevocation.expires_at <= _utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return deleted
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _apply_committed(session):
+    pending = session.info.pop(PENDING_KEY, None)
+    if pending and has_app_context():
+        revocations = get_revocation_list()
+        for entry in pending:
+            _apply(revocations, *entry)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_rolled_back(session):
+    session.info.pop(PENDING_KEY, None)
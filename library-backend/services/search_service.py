@@ -0,0 +1,173 @@
+import re
+from sqlalchemy import text, literal_column, func, inspect
+from models import db, Book
+
+# Full-text search over Book.title / Book.author.
+#  - SQLite:     FTS5 external-content table `book_fts`, kept in sync by triggers
+#  - PostgreSQL: generated, weighted `book.search_vector` tsvector + GIN index
+#  - MySQL:      FULLTEXT indexes on title and author
+# Any other backend (or a database where the index has not been created yet)
+# falls back to the old ilike('%q%') filter.
+
+FTS_TABLE = 'book_fts'
+
+SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, author,
+        content='book', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS book_fts_ai AFTER INSERT ON book BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, author) VALUES (new.id, new.title, new.author);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS book_fts_ad AFTER DELETE ON book BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS book_fts_au AFTER UPDATE OF title, author ON book BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+        INSERT INTO {FTS_TABLE}(rowid, title, author) VALUES (new.id, new.title, new.author);
+    END""",
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS book_fts_au",
+    "DROP TRIGGER IF EXISTS book_fts_ad",
+    "DROP TRIGGER IF EXISTS book_fts_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_DDL = [
+    """ALTER TABLE book ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(author, '')), 'B')
+        ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_book_search_vector ON book USING GIN (search_vector)",
+]
+
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS ix_book_search_vector",
+    "ALTER TABLE book DROP COLUMN IF EXISTS search_vector",
+]
+
+MYSQL_INDEXES = {
+    'ft_book_title': '(title)',
+    'ft_book_author': '(author)',
+}
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+# engine url -> bool, so the "is the index there?" check runs once per process
+_index_ready = {}
+
+
+def create_search_index(bind):
+    """Create the full-text index for the given connection's dialect (idempotent)."""
+    dialect = bind.dialect.name
+    if dialect == 'sqlite':
+        for stmt in SQLITE_DDL:
+            bind.execute(text(stmt))
+        bind.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    elif dialect == 'postgresql':
+        for stmt in POSTGRES_DDL:
+            bind.execute(text(stmt))
+    elif dialect in ('mysql', 'mariadb'):
+        existing = {ix['name'] for ix in inspect(bind).get_indexes('book')}
+        for name, columns in MYSQL_INDEXES.items():
+            if name not in existing:
+                bind.execute(text(f"ALTER TABLE book ADD FULLTEXT INDEX {name} {columns}"))
+    _index_ready.clear()
+
+
+def drop_search_index(bind):
+    dialect = bind.dialect.name
+    if dialect == 'sqlite':
+        for stmt in SQLITE_DROP:
+            bind.execute(text(stmt))
+    elif dialect == 'postgresql':
+        for stmt in POSTGRES_DROP:
+            bind.execute(text(stmt))
+    elif dialect in ('mysql', 'mariadb'):
+        existing = {ix['name'] for ix in inspect(bind).get_indexes('book')}
+        for name in MYSQL_INDEXES:
+            if name in existing:
+                bind.execute(text(f"ALTER TABLE book DROP INDEX {name}"))
+    _index_ready.clear()
+
+
+def rebuild_search_index():
+    """Recreate the index from the book table, e.g. after a bulk load with triggers disabled."""
+    with db.engine.begin() as conn:
+        create_search_index(conn)
+
+
+def search_index_ready():
+    engine = db.engine
+    key = str(engine.url)
+    if key not in _index_ready:
+        dialect = engine.dialect.name
+        insp = inspect(engine)
+        if dialect == 'sqlite':
+            ready = FTS_TABLE in insp.get_table_names()
+        elif dialect == 'postgresql':
+            ready = any(c['name'] == 'search_vector' for c in insp.get_columns('book'))
+        elif dialect in ('mysql', 'mariadb'):
+            names = {ix['name'] for ix in insp.get_indexes('book')}
+            ready = set(MYSQL_INDEXES).issubset(names)
+        else:
+            ready = False
+        _index_ready[key] = ready
+    return _index_ready[key]
+
+
+def search_terms(search_query):
+    return _WORD_RE.findall(search_query or '')
+
+
+def apply_book_search(query, search_query, search_by, ranked=True):
+    """
+    🔎 Filter a Book query by title or author.
+    Every word must match (the last one as a prefix, so search-as-you-type works).
+    When `ranked` is True the query is ordered by relevance, best match first.
+    """
+    if search_by not in ('title', 'author'):
+        return query
+
+    terms = search_terms(search_query)
+    if not terms:
+        return query
+
+    if not search_index_ready():
+        column = Book.title if search_by == 'title' else Book.author
+        return query.filter(column.ilike(f'%{search_query}%'))
+
+    dialect = db.engine.dialect.name
+
+    if dialect == 'sqlite':
+        match = ' '.join(f'"{t}"' for t in terms[:-1]) + f' "{terms[-1]}"*'
+        fts = text(f"SELECT rowid, rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :fts_q") \
+            .bindparams(fts_q=f'{{{search_by}}} : ({match.strip()})') \
+            .columns(rowid=db.Integer, rank=db.Float) \
+            .subquery('fts')
+        query = query.join(fts, fts.c.rowid == Book.id)
+        if ranked:
+            query = query.order_by(fts.c.rank, Book.id)
+        return query
+
+    if dialect == 'postgresql':
+        weight = 'A' if search_by == 'title' else 'B'
+        tsq = func.to_tsquery('simple', ' & '.join(f'{t}:*{weight}' for t in terms))
+        vector = literal_column('book.search_vector')
+        query = query.filter(vector.op('@@')(tsq))
+        if ranked:
+            query = query.order_by(func.ts_rank(vector, tsq).desc(), Book.id)
+        return query
+
+    # mysql / mariadb: terms only ever contain \w characters, so inlining them is safe
+    column = 'title' if search_by == 'title' else 'author'
+    against = ' '.join(f'+{t}' for t in terms) + '*'
+    score = literal_column(f"MATCH (book.{column}) AGAINST ('{against}' IN BOOLEAN MODE)")
+    query = query.filter(score > 0)
+    if ranked:
+        query = query.order_by(score.desc(), Book.id)
+    return query
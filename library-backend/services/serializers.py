@@ -0,0 +1,76 @@
+"""
+Response shapes shared by the routes and the exports.
+
+Every function takes anything with the right attributes (an ORM object or a
+column-projection row) and returns a plain dict. Dates and datetimes are left
+as they are; the JSON provider (utils/json_provider.py) and the exporters
+format them, so every endpoint shows them the same way.
+"""
+from services.borrow_service import display_status
+
+BOOK_FIELDS = ("id", "title", "author", "available", "total_copies", "available_copies", "is_deleted")
+
+
+def book_to_dict(book):
+    return {
+        "id": book.id,
+        "title": book.title,
+        "author": book.author,
+        "available": book.available,
+        "total_copies": book.total_copies,
+        "available_copies": book.available_copies,
+        "is_deleted": book.is_deleted,
+    }
+
+
+def user_to_dict(user):
+    """Admin user list entry."""
+    return {
+        "id": user.id,
+        "name": user.name,
+        "email": user.email,
+        "is_admin": user.is_admin,
+        "email_verified": user.is_verified,
+    }
+
+
+def borrow_record_to_dict(r):
+    """Admin borrow records: falls back to the snapshot kept on the loan when the user is gone."""
+    if r.user_id is None or r.user_is_deleted:
+        user_name = r.borrow_user_name or "Deleted Account"
+        user_email = r.borrow_user_email or "Deleted Account"
+        account_status = "Deleted"
+    else:
+        user_name = r.user_name
+        user_email = r.user_email
+        account_status = "Active"
+
+    return {
+        "borrow_id": r.id,
+        "borrow_date": r.borrow_date,
+        "due_date": r.due_date,
+        "return_date": r.return_date,
+        "user_id": r.user_id,
+        "user_name": user_name,
+        "account_status": account_status,
+        "user_email": user_email,
+        "book_id": r.book_id,
+        "book_title": r.book_title,
+        "book_author": r.book_author,
+        "borrow_status": display_status(r.status),
+    }
+
+
+def borrow_history_to_dict(record, user):
+    """A row of the signed-in user's history; `user` has the name and email, read once per page."""
+    return {
+        "borrow_id": record.id,
+        "user_name": user.name,
+        "user_email": user.email,
+        "book_title": record.book_title,
+        "book_author": record.book_author,
+        "borrow_date": record.borrow_date,
+        "return_date": record.return_date,
+        "due_date": record.due_date,
+        "status": display_status(record.status),
+    }
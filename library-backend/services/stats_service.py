@@ -0,0 +1,100 @@
+from datetime import datetime, timezone
+from sqlalchemy import case, func, insert, select, update
+from models import db, Book, Borrow, BorrowStatus, User, StatCounter
+
+BOOKS = 'books'
+DELETED_BOOKS = 'deleted_books'
+ACTIVE_LOANS = 'active_loans'
+OVERDUE_LOANS = 'overdue_loans'
+VERIFIED_USERS = 'verified_users'
+UNVERIFIED_USERS = 'unverified_users'
+
+STAT_NAMES = (BOOKS, DELETED_BOOKS, ACTIVE_LOANS, OVERDUE_LOANS, VERIFIED_USERS, UNVERIFIED_USERS)
+
+
+def bump(**deltas):
+    """
+    📊 Adjust counters inside the caller's transaction, e.g. bump(books=1).
+    All counters move in one UPDATE; the caller commits together with the
+    change being counted, so the totals can't drift on a rollback.
+    """
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    unknown = set(deltas) - set(STAT_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown stat counter(s): {', '.join(sorted(unknown))}")
+    db.session.execute(
+        update(StatCounter)
+        .where(StatCounter.name.in_(deltas))
+        .values(
+            value=StatCounter.value + case(deltas, value=StatCounter.name, else_=0),
+            updated_at=datetime.now(timezone.utc)
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def read_stats():
+    """The six counter rows, whatever the size of the tables behind them."""
+    rows = db.session.execute(select(StatCounter.name, StatCounter.value, StatCounter.updated_at)).all()
+    stats = {name: 0 for name in STAT_NAMES}
+    updated_at = None
+    for name, value, updated in rows:
+        if name in stats:
+            stats[name] = value
+            updated_at = max(updated_at, updated) if updated_at else updated
+    return stats, updated_at
+
+
+def _count_where(condition):
+    # SUM(CASE ...) rather than COUNT(*) FILTER, which MySQL doesn't have
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def compute_stats():
+    """Count everything from scratch; this is what the counters should be equal to."""
+    books = db.session.execute(
+        select(_count_where(Book.is_deleted == False), _count_where(Book.is_deleted == True))
+    ).one()
+    loans = db.session.execute(
+        select(_count_where(Borrow.status.in_(BorrowStatus.OPEN)), _count_where(Borrow.status == BorrowStatus.OVERDUE))
+    ).one()
+    users = db.session.execute(
+        select(_count_where(User.is_verified == True), func.count(User.id))
+    ).one()
+    return {
+        BOOKS: int(books[0]),
+        DELETED_BOOKS: int(books[1]),
+        ACTIVE_LOANS: int(loans[0]),
+        OVERDUE_LOANS: int(loans[1]),
+        VERIFIED_USERS: int(users[0]),
+        UNVERIFIED_USERS: int(users[1] - users[0]),
+    }
+
+
+def reconcile_stats():
+    """
+    🔧 Overwrite the counters with freshly computed totals and return the drift
+    that was fixed ({name: stored - actual}, non-zero entries only).
+    Creates missing counter rows, so it also initialises a new database.
+    """
+    actual = compute_stats()
+    stored, _ = read_stats()
+    existing = set(db.session.execute(select(StatCounter.name)).scalars())
+    now = datetime.now(timezone.utc)
+
+    missing = [{"name": name, "value": actual[name], "updated_at": now} for name in STAT_NAMES if name not in existing]
+    if missing:
+        db.session.execute(insert(StatCounter), missing)
+    for name in existing & set(STAT_NAMES):
+        if stored[name] != actual[name]:
+            db.session.execute(
+                update(StatCounter).where(StatCounter.name == name)
+                .values(value=actual[name], updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+    db.session.commit()
+
+    return {name: stored[name] - actual[name] for name in STAT_NAMES
+            if name in existing and stored[name] != actual[name]}
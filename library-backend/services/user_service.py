@@ -1,4 +1,7 @@
-from models import User, Borrow
+from sqlalchemy import case, delete, func, or_, select, update
+from models import db, User, Borrow
+from services.stats_service import bump
+from services.revocation_service import revoke_user_sessions
 
 def get_user_by_id(user_id):
     return User.query.get(user_id)
@@ -13,3 +16,83 @@ def get_user_profile(user_id):
         "email": user.email,
         "is_admin": user.is_admin
     }
+
+
+def parse_id_list(data, max_ids):
+    """Validate the {"ids": [...]} body of the bulk endpoints; raises ValueError."""
+    ids = (data or {}).get('ids')
+    if not isinstance(ids, list) or not ids:
+        raise ValueError("ids must be a non-empty list")
+    if len(ids) > max_ids:
+        raise ValueError(f"At most {max_ids} ids per request")
+    if not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        raise ValueError("ids must be integers")
+    return sorted(set(ids))
+
+
+def delete_users(user_ids):
+    """
+    🗑️ Delete users while keeping their loans: every loan gets a snapshot of the
+    borrower's name and email and is flagged is_deleted, then the users go.
+    A fixed handful of statements however many users and loans are involved;
+    the caller commits.
+    Returns the number of users deleted.
+    """
+    verified, total = db.session.execute(
+        select(func.coalesce(func.sum(case((User.is_verified == True, 1), else_=0)), 0), func.count(User.id))
+        .where(User.id.in_(user_ids))
+    ).one()
+    bump(verified_users=-int(verified), unverified_users=-int(total - verified))
+    revoke_user_sessions(user_ids, 'user_deleted')
+
+    borrower = select(User).where(User.id == Borrow.user_id)
+    # ordered_values: MySQL applies SET clauses left to right, so the snapshot
+    # has to be taken before user_id is cleared
+    db.session.execute(
+        update(Borrow)
+        .where(Borrow.user_id.in_(user_ids))
+        .ordered_values(
+            (Borrow.user_name, borrower.with_only_columns(User.name).scalar_subquery()),
+            (Borrow.user_email, borrower.with_only_columns(User.email).scalar_subquery()),
+            (Borrow.is_deleted, True),
+            (Borrow.user_id, None),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return db.session.execute(
+        delete(User).where(User.id.in_(user_ids)).execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def update_users(user_ids, **values):
+    """One UPDATE setting `values` (e.g. is_verified=True) on every listed user."""
+    return db.session.execute(
+        update(User).where(User.id.in_(user_ids)).values(**values).execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def demote_users(user_ids):
+    """
+    Take admin rights away; their tokens still say is_admin, so those are revoked too.
+    Only users that were admins are changed, counted and logged out.
+    """
+    admin_ids = db.session.execute(
+        select(User.id).where(User.id.in_(user_ids), User.is_admin == True)
+    ).scalars().all()
+    if not admin_ids:
+        return 0
+    count = update_users(admin_ids, is_admin=False)
+    revoke_user_sessions(admin_ids, 'demoted')
+    return count
+
+
+def verify_users(user_ids):
+    """Mark users verified; only rows that actually change are counted."""
+    count = db.session.execute(
+        update(User)
+        .where(User.id.in_(user_ids), or_(User.is_verified == False, User.is_verified.is_(None)))
+        .values(is_verified=True)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    bump(verified_users=count, unverified_users=-count)
+    return count
@@ -0,0 +1,64 @@
+import time
+from functools import wraps
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = 'replica'
+STICKY_COOKIE = 'db_primary_until'
+WRITE_METHODS = {'POST', 'PUT', 'PATCH', 'DELETE'}
+
+
+def _replica_requested():
+    return has_request_context() and g.get('db_use_replica', False)
+
+
+class RoutingSession(Session):
+    """
+    🔀 Sends the queries of @read_replica views to the 'replica' bind, when one
+    is configured. Everything else, and anything flushed, stays on the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is None and not self._flushing and _replica_requested():
+            engines = self._db.engines
+            if engine is engines.get(None) and REPLICA_BIND in engines:
+                return engines[REPLICA_BIND]
+        return engine
+
+
+def _recently_wrote():
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def read_replica(view):
+    """
+    Route a read-only view to the replica, unless this client wrote something
+    in the last REPLICA_STICKY_SECONDS (read-your-writes).
+    """
+    @wraps(view)
+    def decorated(*args, **kwargs):
+        g.db_use_replica = not _recently_wrote()
+        try:
+            return view(*args, **kwargs)
+        finally:
+            # g can outlive the request (shared app context), writes must not inherit this
+            g.db_use_replica = False
+    return decorated
+
+
+def init_replica_routing(app):
+    """After a successful write, pin the client to the primary for a few seconds."""
+    if REPLICA_BIND not in (app.config.get('SQLALCHEMY_BINDS') or {}):
+        return
+
+    @app.after_request
+    def stick_to_primary(response):
+        if request.method in WRITE_METHODS and response.status_code < 400:
+            sticky = current_app.config['REPLICA_STICKY_SECONDS']
+            response.set_cookie(STICKY_COOKIE, f"{time.time() + sticky:.3f}", max_age=sticky,
+                                httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,57 @@
+import csv
+import io
+from datetime import date, datetime
+from flask import Response, stream_with_context
+from utils.json_provider import dumps, isoformat
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+# Rows are buffered and flushed in chunks so the response isn't one tiny
+# write per row, while memory stays independent of the export size.
+FLUSH_EVERY = 500
+
+
+def _csv_value(value):
+    if isinstance(value, (datetime, date)):
+        return isoformat(value)
+    return value
+
+
+def iter_csv(rows, fields):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for i, row in enumerate(rows, start=1):
+        writer.writerow([_csv_value(row.get(field)) for field in fields])
+        if i % FLUSH_EVERY == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_ndjson(rows, fields):
+    chunk = []
+    for row in rows:
+        chunk.append(dumps({field: row.get(field) for field in fields}))
+        if len(chunk) >= FLUSH_EVERY:
+            yield "\n".join(chunk) + "\n"
+            chunk = []
+    if chunk:
+        yield "\n".join(chunk) + "\n"
+
+
+def export_response(rows, fields, fmt, filename):
+    """
+    📤 Stream `rows` (an iterator of dicts) as a CSV or NDJSON download.
+    Nothing is materialized: rows are pulled from the iterator as the client reads.
+    """
+    if fmt == 'ndjson':
+        body, mimetype = iter_ndjson(rows, fields), 'application/x-ndjson'
+    else:
+        body, mimetype = iter_csv(rows, fields), 'text/csv'
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    )
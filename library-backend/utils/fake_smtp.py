@@ -0,0 +1,110 @@
+"""
+📭 Minimal local SMTP sink for development and offline testing.
+
+Accepts every message without authentication and keeps it in memory
+(and optionally writes it to a directory as .eml). Point the app at it with
+
+    MAIL_SERVER=127.0.0.1 MAIL_PORT=1025 MAIL_USE_SSL=False MAIL_USERNAME=
+
+and run `flask outbox fake-smtp`, or start it in-process with FakeSMTPServer.
+"""
+import os
+import socketserver
+import threading
+from email import message_from_bytes
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+
+    def _reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self._reply("220 fake-smtp ready")
+        mail_from, rcpt_to = None, []
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").rstrip("\r\n")
+            verb = command.split(" ", 1)[0].upper()
+
+            if verb == "EHLO":
+                self._reply("250-fake-smtp")
+                self._reply("250 8BITMIME")
+            elif verb == "HELO":
+                self._reply("250 fake-smtp")
+            elif verb == "MAIL":
+                mail_from, rcpt_to = command.split(":", 1)[1].strip().strip("<>"), []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip().strip("<>")
+                if address in self.server.fail_recipients:
+                    self._reply("550 Mailbox unavailable")
+                else:
+                    rcpt_to.append(address)
+                    self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                self.server.deliver(mail_from, rcpt_to, self._read_data())
+                mail_from, rcpt_to = None, []
+                self._reply("250 OK: queued")
+            elif verb in ("RSET", "NOOP"):
+                if verb == "RSET":
+                    mail_from, rcpt_to = None, []
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+    def _read_data(self):
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                break
+            if line.startswith(b".."):
+                line = line[1:]
+            lines.append(line)
+        return b"".join(lines)
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=1025, maildir=None, fail_recipients=()):
+        super().__init__((host, port), _SMTPHandler)
+        self.maildir = maildir
+        # RCPT TO for these addresses is refused, to exercise retries and dead-lettering
+        self.fail_recipients = set(fail_recipients)
+        self.messages = []
+        self._lock = threading.Lock()
+        if maildir:
+            os.makedirs(maildir, exist_ok=True)
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def deliver(self, mail_from, rcpt_to, data):
+        message = message_from_bytes(data)
+        with self._lock:
+            self.messages.append({"from": mail_from, "to": rcpt_to, "message": message})
+            count = len(self.messages)
+        if self.maildir:
+            with open(os.path.join(self.maildir, f"{count:06d}.eml"), "wb") as f:
+                f.write(data)
+
+    def start(self):
+        """Serve from a background thread; returns self so it can be used inline."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
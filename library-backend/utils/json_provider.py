@@ -0,0 +1,87 @@
+"""
+⚡ JSON encoding for every response.
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise; both produce the same output. Dates are ISO 8601 ("2026-10-18")
+and datetimes, which the schema stores as naive UTC, are ISO 8601 with a "Z"
+("2026-10-18T09:30:00Z"), instead of Flask's default HTTP-date strings.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+
+def isoformat(value):
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            return value.isoformat() + "Z"
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    return value.isoformat()
+
+
+def _default(value):
+    """Types neither encoder handles by itself (orjson already does dates and UUIDs)."""
+    if isinstance(value, (datetime, date)):
+        return isoformat(value)
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, "__html__"):
+        return str(value.__html__())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def stdlib_dumps_bytes(obj, indent=False):
+    return json.dumps(obj, default=_default, ensure_ascii=False,
+                      indent=2 if indent else None,
+                      separators=None if indent else (",", ":")).encode()
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def orjson_dumps_bytes(obj, indent=False):
+        return orjson.dumps(obj, default=_default,
+                            option=_ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0))
+
+    dumps_bytes, _loads = orjson_dumps_bytes, orjson.loads
+else:
+    orjson_dumps_bytes = None
+    dumps_bytes, _loads = stdlib_dumps_bytes, json.loads
+
+
+def dumps(obj):
+    return dumps_bytes(obj).decode()
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider on top of dumps_bytes(). Responses are built from the
+    encoded bytes directly; keys keep their insertion order.
+    """
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        return dumps_bytes(obj, indent=bool(kwargs.get("indent"))).decode()
+
+    def loads(self, s, **kwargs):
+        return _loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(dumps_bytes(obj, indent=indent), mimetype=self.mimetype)
+
+
+def init_json(app):
+    if app.config.get("JSON_PROVIDER", "fast") == "fast":
+        app.json = FastJSONProvider(app)
@@ -0,0 +1,231 @@
+"""
+🪵 Non-blocking structured logging.
+
+Request threads only put records on a bounded in-memory queue; a single
+listener thread formats them as JSON lines and writes them to stdout. When the
+queue is full the record is dropped (and counted) rather than blocking the
+request. Levels are configured per logger, chatty loggers can be sampled, and
+anything that looks like a token or password is redacted before it is written.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, request
+
+REDACTED = "[REDACTED]"
+SENSITIVE_KEYS = {"token", "password", "secret", "authorization", "cookie", "reset_token"}
+_SENSITIVE_PATTERNS = (
+    # JWTs (auth, reset and verification tokens)
+    (re.compile(r"eyJ[\w-]+\.[\w-]+\.[\w-]+"), REDACTED),
+    (re.compile(r"(?i)\b(bearer\s+)[\w.~+/=-]+"), r"\1" + REDACTED),
+    # token=..., "password": "...", reset_token: ...
+    (re.compile(r"(?i)\b(\w*(?:token|password|secret)[\"']?\s*[=:]\s*[\"']?)[^\s&\"',}]+"), r"\1" + REDACTED),
+)
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_pipeline = None
+
+
+def redact(text):
+    for pattern, replacement in _SENSITIVE_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def _redact_value(key, value):
+    if key.lower() in SENSITIVE_KEYS:
+        return REDACTED
+    if isinstance(value, str):
+        return redact(value)
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    return redact(str(value))
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, any `extra=` fields, exc."""
+
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": redact(record.getMessage()),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = _redact_value(key, value)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = redact(record.exc_text)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human readable lines for local development, still redacted."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record):
+        return redact(super().format(record))
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of the records of high-volume loggers, e.g.
+    {"app.access": 0.1}. Warnings and errors are always kept.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def _rate(self, name):
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1.0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Enqueues without waiting. The message and traceback are rendered here, so
+    the listener never touches objects the request may still be mutating.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record = copy.copy(record)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LoggingPipeline:
+    def __init__(self, stream=None, fmt="json", queue_size=10000, sample_rates=None):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.handler = NonBlockingQueueHandler(self.queue)
+        self.handler.addFilter(SamplingFilter(sample_rates or {}))
+        self.output = logging.StreamHandler(stream or sys.stdout)
+        self.output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+        self.listener = QueueListener(self.queue, self.output, respect_handler_level=True)
+
+    @property
+    def dropped(self):
+        return self.handler.dropped
+
+    def start(self):
+        self.listener.start()
+        return self
+
+    def stop(self):
+        """Flush what is queued and stop the listener thread."""
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def restart_after_fork(self):
+        # A forked worker (gunicorn --preload) inherits the queue but not the thread
+        self.listener._thread = None
+        self.listener.start()
+
+
+def parse_levels(spec):
+    """'sqlalchemy.engine=WARNING,services=DEBUG' -> {'sqlalchemy.engine': 'WARNING', 'services': 'DEBUG'}"""
+    levels = {}
+    for item in (spec or "").split(","):
+        name, sep, level = item.partition("=")
+        if sep and name.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def parse_sample_rates(spec):
+    """'app.access=0.1' -> {'app.access': 0.1}"""
+    return {name: float(rate) for name, rate in parse_levels(spec).items()}
+
+
+def _install_access_log(app):
+    access = logging.getLogger("app.access")
+
+    @app.before_request
+    def start_access_timer():
+        g._access_start = time.perf_counter()
+
+    @app.after_request
+    def log_access(response):
+        start = g.pop("_access_start", None)
+        if start is not None and access.isEnabledFor(logging.INFO):
+            rule = request.url_rule
+            level = logging.ERROR if response.status_code >= 500 else logging.INFO
+            access.log(level, "%s %s %s", request.method, request.path, response.status_code, extra={
+                "route": rule.rule if rule is not None else "unmatched",
+                "status": response.status_code,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+            })
+        return response
+
+
+def get_pipeline():
+    return _pipeline
+
+
+def init_logging(app):
+    """
+    Route the root logger through the queue pipeline. The listener is shared
+    by every app in the process (tests and benchmarks build several); levels
+    and sampling follow the latest config.
+    """
+    global _pipeline
+    config = app.config
+    root = logging.getLogger()
+    if _pipeline is None:
+        _pipeline = LoggingPipeline(fmt=config.get("LOG_FORMAT", "json"),
+                                    queue_size=config.get("LOG_QUEUE_SIZE", 10000)).start()
+        atexit.register(_pipeline.stop)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_pipeline.restart_after_fork)
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_pipeline.handler)
+    _pipeline.handler.filters[0].rates = parse_sample_rates(config.get("LOG_SAMPLE_RATES"))
+
+    root.setLevel(config.get("LOG_LEVEL", "INFO").upper())
+    for name, level in parse_levels(config.get("LOG_LEVELS")).items():
+        logging.getLogger(name).setLevel(level)
+
+    # Flask's app.logger adds its own stderr handler when none is configured
+    app.logger.handlers.clear()
+    app.logger.propagate = True
+
+    if config.get("ACCESS_LOG_ENABLED", True):
+        _install_access_log(app)
+    return _pipeline
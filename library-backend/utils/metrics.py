@@ -0,0 +1,186 @@
+import threading
+import time
+from bisect import bisect_left
+from flask import current_app, g, request
+from sqlalchemy import event
+
+# Upper bounds in seconds; +Inf is implied
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in pairs)
+
+
+def _fmt(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """
+    📈 Request and SQL metrics kept in process memory, rendered in the
+    Prometheus text format. Recording is a dict lookup and a few additions
+    under one lock, so it stays cheap enough to leave on in production.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.requests = {}        # (method, route, status) -> count
+        self.latency = {}         # (method, route) -> Histogram
+        self.in_flight = {}       # route -> gauge
+        self.queries = {}         # (method, route) -> Histogram of statements per request
+        self.db_time = {}         # (method, route) -> Histogram of DB seconds per request
+        self.queries_total = 0
+        self.db_seconds_total = 0.0
+
+    # --- request side ---
+
+    def request_started(self, route):
+        with self._lock:
+            self.in_flight[route] = self.in_flight.get(route, 0) + 1
+        local = self._local
+        local.active, local.queries, local.db_seconds = True, 0, 0.0
+
+    def request_finished(self, method, route, status, seconds):
+        local = self._local
+        queries, db_seconds = local.queries, local.db_seconds
+        local.active = False
+        key = (method, route)
+        with self._lock:
+            self.in_flight[route] -= 1
+            counter_key = (method, route, status)
+            self.requests[counter_key] = self.requests.get(counter_key, 0) + 1
+            for table, bounds, value in ((self.latency, LATENCY_BUCKETS, seconds),
+                                         (self.queries, QUERY_COUNT_BUCKETS, queries),
+                                         (self.db_time, DB_TIME_BUCKETS, db_seconds)):
+                hist = table.get(key)
+                if hist is None:
+                    hist = table[key] = Histogram(bounds)
+                hist.observe(value)
+
+    # --- engine side ---
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.query_start = time.perf_counter()
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        local = self._local
+        elapsed = time.perf_counter() - getattr(local, 'query_start', time.perf_counter())
+        if getattr(local, 'active', False):
+            local.queries += 1
+            local.db_seconds += elapsed
+        with self._lock:
+            self.queries_total += 1
+            self.db_seconds_total += elapsed
+
+    def watch_engine(self, engine):
+        event.listen(engine, 'before_cursor_execute', self.before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self.after_cursor_execute)
+
+    # --- exposition ---
+
+    def render(self):
+        lines = []
+        with self._lock:
+            lines += ["# HELP http_requests_total Requests handled, by route and status.",
+                      "# TYPE http_requests_total counter"]
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(f"http_requests_total{{{_labels((('method', method), ('route', route), ('status', status)))}}} {count}")
+
+            lines += ["# HELP http_requests_in_flight Requests currently being handled.",
+                      "# TYPE http_requests_in_flight gauge"]
+            for route, value in sorted(self.in_flight.items()):
+                lines.append(f"http_requests_in_flight{{{_labels((('route', route),))}}} {value}")
+
+            self._render_histograms(lines, "http_request_duration_seconds",
+                                    "Request latency in seconds.", self.latency)
+            self._render_histograms(lines, "db_queries_per_request",
+                                    "SQL statements executed per request.", self.queries)
+            self._render_histograms(lines, "db_seconds_per_request",
+                                    "Time spent in SQL per request.", self.db_time)
+
+            lines += ["# HELP db_queries_total SQL statements executed, including outside requests.",
+                      "# TYPE db_queries_total counter",
+                      f"db_queries_total {self.queries_total}",
+                      "# HELP db_seconds_total Time spent in SQL, including outside requests.",
+                      "# TYPE db_seconds_total counter",
+                      f"db_seconds_total {_fmt(self.db_seconds_total)}"]
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histograms(lines, name, help_text, table):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for (method, route), hist in sorted(table.items()):
+            base = (('method', method), ('route', route))
+            cumulative = 0
+            for bound, count in zip(hist.bounds + ('+Inf',), hist.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{{{_labels(base + (('le', bound),))}}} {cumulative}")
+            lines.append(f"{name}_sum{{{_labels(base)}}} {_fmt(hist.sum)}")
+            lines.append(f"{name}_count{{{_labels(base)}}} {hist.count}")
+
+
+def get_metrics(app=None):
+    app = app or current_app
+    return app.extensions.get('metrics')
+
+
+def _route_label():
+    # The URL rule keeps label cardinality bounded (/api/books/<int:book_id>, not every id)
+    rule = request.url_rule
+    return rule.rule if rule is not None else "unmatched"
+
+
+def init_metrics(app, db):
+    """Install request hooks and engine listeners; no-op when METRICS_ENABLED is off."""
+    if not app.config.get('METRICS_ENABLED', True):
+        return None
+
+    metrics = app.extensions['metrics'] = Metrics()
+    with app.app_context():
+        for engine in db.engines.values():
+            metrics.watch_engine(engine)
+
+    @app.before_request
+    def start_timer():
+        g._metrics_route = _route_label()
+        g._metrics_start = time.perf_counter()
+        metrics.request_started(g._metrics_route)
+
+    @app.after_request
+    def remember_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def record_request(exc):
+        start = g.pop('_metrics_start', None)
+        if start is None:
+            return
+        status = 500 if exc is not None else g.pop('_metrics_status', 500)
+        metrics.request_finished(request.method, g.pop('_metrics_route'), status,
+                                 time.perf_counter() - start)
+
+    return metrics
@@ -0,0 +1,136 @@
+"""
+🔢 Totals for the paginated lists.
+
+An exact COUNT(*) over a filtered list can cost as much as the page itself,
+so totals are:
+- optional: include_total=false skips the count and answers hasNextPage instead;
+- cached per list and normalized filter set for PAGE_COUNT_CACHE_TTL seconds,
+  so flipping pages of the same filter counts once;
+- estimated on request (count=estimate): PostgreSQL's planner row estimate
+  from EXPLAIN, which reads no rows. Other databases count exactly.
+
+Only the book lists are invalidated on writes (through catalog_changed());
+the other totals can lag by up to the TTL, per worker.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+from flask import current_app
+from extensions import db
+
+# Parameters that pick the page, not the rows, so they are left out of the key
+PAGE_PARAMS = {'page', 'limit', 'cursor', 'after', 'include_total', 'count'}
+COUNT_MODES = ('exact', 'estimate')
+
+
+class CountCache:
+    """Bounded LRU of list totals with a TTL, keyed by (scope, list, filters)."""
+
+    def __init__(self, maxsize=1024, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, total):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (total, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, scope=None):
+        with self._lock:
+            if scope is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == scope]:
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def get_count_cache(app=None):
+    app = app or current_app
+    cache = app.extensions.get('count_cache')
+    if cache is None:
+        cache = app.extensions['count_cache'] = CountCache(
+            app.config.get('PAGE_COUNT_CACHE_SIZE', 1024),
+            app.config.get('PAGE_COUNT_CACHE_TTL', 30)
+        )
+    return cache
+
+
+def invalidate_counts(scope=None):
+    """Forget the cached totals of `scope` ('books', 'borrows', 'users'), or all of them."""
+    get_count_cache().invalidate(scope)
+
+
+def total_requested(args):
+    return args.get('include_total', 'true').lower() not in ('false', '0', 'no')
+
+
+def count_mode(args):
+    mode = args.get('count') or current_app.config.get('PAGE_COUNT_MODE', 'exact')
+    return mode if mode in COUNT_MODES else 'exact'
+
+
+def filter_key(args):
+    """The list's filters with the paging parameters and empty values removed, in a stable order."""
+    return urlencode(sorted(
+        (k, v.strip()) for k, v in args.items(multi=True) if k not in PAGE_PARAMS and v.strip()
+    ))
+
+
+def estimate_count(query):
+    """PostgreSQL's estimate of the rows `query` returns, from EXPLAIN; None on other databases."""
+    connection = db.session.connection()
+    if connection.dialect.name != 'postgresql':
+        return None
+    compiled = query.order_by(None).statement.compile(
+        dialect=connection.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def page_counter(scope, name, args):
+    """
+    The total for offset_paginate(): None when the client asked for no total,
+    else count(query) -> (total, estimated), served from the cache when it can.
+    """
+    if not total_requested(args):
+        return None
+    mode = count_mode(args)
+    key = (scope, name, mode, filter_key(args))
+
+    def count(query):
+        cache = get_count_cache()
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        total = estimate_count(query) if mode == 'estimate' else None
+        result = (query.order_by(None).count(), False) if total is None else (total, True)
+        cache.put(key, result)
+        return result
+    return count
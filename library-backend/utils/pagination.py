@@ -0,0 +1,140 @@
+import base64
+import json
+from math import ceil
+from datetime import date, datetime
+from sqlalchemy import and_, or_
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+    return value
+
+
+def encode_cursor(values):
+    """Turn the sort-key values of the last row on a page into an opaque string."""
+    raw = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("Invalid cursor")
+    try:
+        return [_decode_value(v) for v in values]
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def cursor_requested(args):
+    """
+    Keyset mode is opt-in: any `cursor` (or its alias `after`) parameter turns it on.
+    An empty value asks for the first page.
+    """
+    return 'cursor' in args or 'after' in args
+
+
+def get_cursor(args):
+    return args.get('cursor') or args.get('after') or None
+
+
+def order_by_key(query, sort_key, descending=False):
+    return query.order_by(*[col.desc() if descending else col.asc() for col in sort_key])
+
+
+def offset_paginate(query, sort_key, page, limit, count=None, descending=False):
+    """
+    📄 Page `page` (1-based) of `query` ordered by `sort_key`.
+
+    `count(query) -> (total, estimated)` supplies the total (see
+    utils/page_counts.py); without it no count runs and one extra row is
+    fetched to tell whether a next page exists. A page that comes back short
+    ends the list, so its total is known exactly without counting.
+
+    Returns (rows, total, page_info); total is None when not counted.
+    """
+    page, limit = max(page, 1), max(limit, 1)
+    offset = (page - 1) * limit
+    rows = order_by_key(query, sort_key, descending).offset(offset).limit(limit + 1).all()
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+
+    if count is None:
+        return rows, None, {"hasNextPage": has_next}
+
+    if not has_next and (rows or page == 1):
+        total, estimated = offset + len(rows), False
+    else:
+        total, estimated = count(query)
+        if rows:
+            # A stale or estimated total can't be lower than what this page has shown
+            total = max(total, offset + len(rows) + has_next)
+    page_info = {"totalPages": ceil(total / limit), "hasNextPage": has_next}
+    if estimated:
+        page_info["totalEstimated"] = True
+    return rows, total, page_info
+
+
+def keyset_paginate(query, sort_key, cursor, limit, descending=False, row_key=None):
+    """
+    📜 Fetch one page of `query` ordered by `sort_key` (a tuple of columns ending
+    with a unique column, e.g. (Book.title, Book.id)), starting after `cursor`.
+
+    The cursor is a seek predicate on the sort key instead of an OFFSET, so page
+    1000 costs the same as page 1 given an index on the sort key.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    `row_key` extracts the sort-key values from a result row and defaults to
+    reading the attributes named like the sort-key columns.
+    """
+    # limit=0 (or below) would return a row to cut and nothing to build the cursor from
+    limit = max(limit, 1)
+    if cursor:
+        values = decode_cursor(cursor, len(sort_key))
+        query = query.filter(_seek_condition(sort_key, values, descending))
+
+    rows = order_by_key(query, sort_key, descending).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if row_key is None:
+            values = [getattr(last, col.key) for col in sort_key]
+        else:
+            values = row_key(last)
+        next_cursor = encode_cursor(values)
+
+    return rows, next_cursor
+
+
+def _seek_condition(sort_key, values, descending):
+    # (a, b, c) > (x, y, z) written out as
+    # a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+    # which every backend can turn into an index range scan.
+    clauses = []
+    for i, col in enumerate(sort_key):
+        equal = [sort_key[j] == values[j] for j in range(i)]
+        beyond = col < values[i] if descending else col > values[i]
+        clauses.append(and_(*equal, beyond))
+    return or_(*clauses)
@@ -0,0 +1,44 @@
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import event
+
+
+class QueryCounter:
+    """Counts SQL statements (and time spent in them) executed on an engine."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = []
+        self._local = threading.local()
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.start = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.seconds += time.perf_counter() - getattr(self._local, 'start', time.perf_counter())
+        self.statements.append(statement)
+
+    def reset(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = []
+
+
+@contextmanager
+def count_queries(engine):
+    """
+    with count_queries(db.engine) as counter:
+        client.get(...)
+    counter.count  # statements executed inside the block
+    """
+    counter = QueryCounter()
+    event.listen(engine, 'before_cursor_execute', counter._before)
+    event.listen(engine, 'after_cursor_execute', counter._after)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter._before)
+        event.remove(engine, 'after_cursor_execute', counter._after)
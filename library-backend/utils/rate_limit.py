@@ -0,0 +1,199 @@
+"""
+🚦 Rate limiting for the expensive unauthenticated endpoints.
+
+Each limit is a token bucket ("5/minute" = bursts of up to 5, refilled at one
+every 12 seconds), implemented as GCRA: a bucket is a single timestamp, the
+"theoretical arrival time" of the next request, so a shared store can update
+it atomically in one step.
+
+Requests are checked per client IP and, when the body carries one, per email
+address, before the view runs. A refused request gets a 429 with Retry-After.
+
+Buckets live in MemoryStore (per process) by default. Set
+RATE_LIMIT_STORAGE_URI to redis://... to share them between workers; anything
+with the same hit() method can be plugged in with set_store().
+"""
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+from functools import wraps
+from flask import current_app, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_LIMIT_RE = re.compile(r"^\s*(\d+)\s*(?:/|per)\s*(\d*)\s*(second|minute|hour|day)s?\s*$")
+
+
+def parse_limit(spec):
+    """'5/minute' or '100 per 15 minutes' -> (5, 60.0). Raises ValueError."""
+    match = _LIMIT_RE.match(spec or "")
+    if not match or int(match.group(1)) < 1:
+        raise ValueError(f"Invalid rate limit {spec!r}, expected e.g. '5/minute'")
+    count, multiplier, unit = match.groups()
+    return int(count), float(int(multiplier or 1) * _PERIODS[unit])
+
+
+class MemoryStore:
+    """Buckets in a dict, for a single process (and for tests)."""
+
+    def __init__(self, max_keys=100000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._tats = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key, count, period):
+        """Take one token from `key`. Returns (allowed, retry_after_seconds, remaining)."""
+        interval = period / count
+        with self._lock:
+            now = self.clock()
+            tat = max(self._tats.get(key, now), now)
+            new_tat = tat + interval
+            if new_tat - now > period + 1e-9:
+                return False, new_tat - now - period, 0
+            if key not in self._tats and len(self._tats) >= self.max_keys:
+                self._evict(now)
+            self._tats[key] = new_tat
+            return True, 0.0, int((period - (new_tat - now)) / interval)
+
+    def _evict(self, now):
+        # Full buckets carry no state; drop those first, then the oldest keys
+        for key in [k for k, tat in self._tats.items() if tat <= now]:
+            del self._tats[key]
+        while len(self._tats) >= self.max_keys:
+            del self._tats[next(iter(self._tats))]
+
+    def reset(self):
+        with self._lock:
+            self._tats.clear()
+
+
+# KEYS[1] bucket; ARGV interval, period (seconds). Uses the server clock so workers agree.
+_GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval
+if new_tat - now > period + 1e-9 then
+    return {0, tostring(new_tat - now - period), 0}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, '0', math.floor((period - (new_tat - now)) / interval)}
+"""
+
+
+class RedisStore:
+    """Buckets shared by every worker, in Redis (needs the `redis` package)."""
+
+    def __init__(self, url, prefix="ratelimit:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._script = self.client.register_script(_GCRA_SCRIPT)
+
+    def hit(self, key, count, period):
+        allowed, retry_after, remaining = self._script(keys=[self.prefix + key], args=[period / count, period])
+        return bool(allowed), float(retry_after), int(remaining)
+
+    def reset(self):
+        for key in self.client.scan_iter(self.prefix + "*"):
+            self.client.delete(key)
+
+
+def store_from_uri(uri):
+    if not uri or uri.startswith("memory://"):
+        return MemoryStore()
+    if uri.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStore(uri)
+    raise ValueError(f"Unsupported RATE_LIMIT_STORAGE_URI {uri!r}")
+
+
+class RateLimiter:
+    def __init__(self, store, limits, trusted_proxies=0, enabled=True):
+        self.store = store
+        # {"login": {"ip": (20, 60.0), "email": (5, 60.0)}, ...}
+        self.limits = {
+            name: {scope: parse_limit(spec) for scope, spec in scopes.items() if spec}
+            for name, scopes in limits.items()
+        }
+        self.trusted_proxies = trusted_proxies
+        self.enabled = enabled
+
+    def client_ip(self):
+        # Behind N proxies the client is the Nth address from the right of X-Forwarded-For
+        if self.trusted_proxies:
+            forwarded = [a.strip() for a in request.headers.get("X-Forwarded-For", "").split(",") if a.strip()]
+            if len(forwarded) >= self.trusted_proxies:
+                return forwarded[-self.trusted_proxies]
+        return request.remote_addr or "unknown"
+
+    def check(self, name, email=None):
+        """Returns None when the request may go ahead, else the seconds to wait."""
+        if not self.enabled:
+            return None
+        scopes = self.limits.get(name, {})
+        subjects = [("ip", self.client_ip())]
+        if email:
+            # Hashed: the store does not need to hold addresses
+            subjects.append(("email", hashlib.sha256(email.strip().lower().encode()).hexdigest()[:32]))
+
+        for scope, subject in subjects:
+            if scope not in scopes:
+                continue
+            count, period = scopes[scope]
+            try:
+                allowed, retry_after, _ = self.store.hit(f"{name}:{scope}:{subject}", count, period)
+            except Exception as e:
+                # A shared store outage must not lock everybody out
+                logger.warning("Rate limit store failed, allowing request: %s", e)
+                return None
+            if not allowed:
+                logger.info("Rate limited %s by %s", name, scope, extra={"limit": name, "scope": scope})
+                return retry_after
+        return None
+
+
+def get_rate_limiter(app=None):
+    app = app or current_app
+    limiter = app.extensions.get("rate_limiter")
+    if limiter is None:
+        config = app.config
+        limiter = app.extensions["rate_limiter"] = RateLimiter(
+            store_from_uri(config.get("RATE_LIMIT_STORAGE_URI")),
+            config.get("RATE_LIMITS", {}),
+            trusted_proxies=config.get("RATE_LIMIT_TRUSTED_PROXIES", 0),
+            enabled=config.get("RATE_LIMIT_ENABLED", True),
+        )
+    return limiter
+
+
+def set_store(store, app=None):
+    """Swap the bucket store, e.g. a fresh MemoryStore in tests."""
+    get_rate_limiter(app).store = store
+
+
+def rate_limited(name):
+    """Check the `name` limits (per IP, and per the body's "email") before the view runs."""
+    def decorator(view):
+        @wraps(view)
+        def decorated(*args, **kwargs):
+            body = request.get_json(silent=True)
+            email = body.get("email") if isinstance(body, dict) else None
+            retry_after = get_rate_limiter().check(name, email if isinstance(email, str) else None)
+            if retry_after is not None:
+                seconds = max(1, math.ceil(retry_after))
+                response = jsonify({"error": f"Too many requests, try again in {seconds} seconds"})
+                response.status_code = 429
+                response.headers["Retry-After"] = str(seconds)
+                return response
+            return view(*args, **kwargs)
+        return decorated
+    return decorator
@@ -0,0 +1,108 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+from flask import current_app, request
+from utils.page_counts import invalidate_counts
+
+
+class ResponseCache:
+    """
+    🗂️ In-process cache of serialized JSON responses keyed by normalized query string.
+
+    Every entry is tagged with the catalog version it was built from. Mutations
+    call invalidate(), which bumps the version so all older entries are ignored.
+    `ttl` bounds how stale another worker process can be, since invalidation is
+    per process.
+    """
+
+    def __init__(self, maxsize=512, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["version"] != self.version or entry["expires"] <= time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body, version):
+        entry = {
+            "body": body,
+            "etag": hashlib.blake2b(body, digest_size=16).hexdigest(),
+            "version": version,
+            "expires": time.monotonic() + self.ttl,
+        }
+        if self.maxsize <= 0:
+            return entry
+        with self._lock:
+            # A mutation may have landed while the body was being built
+            if version == self.version:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "version": self.version, "hits": self.hits, "misses": self.misses}
+
+
+def get_catalog_cache(app=None):
+    app = app or current_app
+    cache = app.extensions.get('catalog_cache')
+    if cache is None:
+        cache = app.extensions['catalog_cache'] = ResponseCache(
+            app.config.get('CATALOG_CACHE_SIZE', 512),
+            app.config.get('CATALOG_CACHE_TTL', 30)
+        )
+    return cache
+
+
+def catalog_changed():
+    """Call after committing any change to books or their availability."""
+    get_catalog_cache().invalidate()
+    invalidate_counts('books')
+
+
+def normalized_query_key(args):
+    return urlencode(sorted(args.items(multi=True)))
+
+
+def cached_json_response(cache, key, build):
+    """
+    Serve `key` from `cache`, calling build() -> (payload, status) on a miss.
+    Only 200 responses are cached. Cached responses carry an ETag and honour
+    If-None-Match with a 304.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        version = cache.version
+        payload, status = build()
+        response = current_app.json.response(payload)
+        if status != 200:
+            response.status_code = status
+            return response
+        entry = cache.put(key, response.get_data(), version)
+
+    response = current_app.response_class(entry["body"], mimetype=current_app.json.mimetype)
+    response.set_etag(entry["etag"])
+    max_age = current_app.config.get('CATALOG_CACHE_MAX_AGE', 0)
+    response.headers["Cache-Control"] = f"public, max-age={max_age}" if max_age else "public, no-cache"
+    return response.make_conditional(request)
@@ -0,0 +1,61 @@
+import threading
+import time
+
+
+class RevocationList:
+    """
+    🚫 In-memory copy of the token_revocation log, checked on every request.
+
+    Two plain dicts: user id -> lowest generation still valid, and revoked
+    jti -> expiry. A check is one or two dict lookups and no lock; writers
+    take the lock and prune() swaps in rebuilt dicts, so readers never see a
+    half-updated table. Entries carry the time after which every token they
+    cover has expired anyway, and are dropped then.
+    """
+
+    def __init__(self):
+        self._generations = {}
+        self._jtis = {}
+        self._lock = threading.Lock()
+        # Incremental sync state, see services/revocation_service.py
+        self.synced_through = None
+        self.next_sync = 0.0
+        self.next_prune = 0.0
+        self.sync_lock = threading.Lock()
+
+    def revoke_user(self, user_id, generation, expires_at):
+        """Tokens of `user_id` with a "gen" below `generation` are revoked until `expires_at` (epoch seconds)."""
+        with self._lock:
+            current = self._generations.get(user_id)
+            if current is None or (generation, expires_at) > current:
+                self._generations[user_id] = (generation, expires_at)
+
+    def revoke_token(self, jti, expires_at):
+        with self._lock:
+            self._jtis[jti] = max(expires_at, self._jtis.get(jti, 0))
+
+    def is_revoked(self, claims):
+        entry = self._generations.get(claims.get('id'))
+        if entry is not None and (claims.get('gen') or 0) < entry[0]:
+            return True
+        jti = claims.get('jti')
+        return jti is not None and jti in self._jtis
+
+    def prune(self, now=None):
+        """Drop entries whose tokens have all expired. Returns how many went."""
+        now = time.time() if now is None else now
+        with self._lock:
+            generations = {k: v for k, v in self._generations.items() if v[1] > now}
+            jtis = {k: exp for k, exp in self._jtis.items() if exp > now}
+            dropped = len(self._generations) - len(generations) + len(self._jtis) - len(jtis)
+            self._generations, self._jtis = generations, jtis
+        return dropped
+
+    def clear(self):
+        with self._lock:
+            self._generations, self._jtis = {}, {}
+            self.synced_through = None
+            self.next_sync = self.next_prune = 0.0
+
+    def stats(self):
+        return {"users": len(self._generations), "tokens": len(self._jtis)}
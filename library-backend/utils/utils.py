@@ -1,20 +1,27 @@
 import jwt
+import uuid
 from datetime import datetime, timezone,timedelta
 from flask import current_app
 from models import User
 from models import db  # Needed for reset token saving
 
+AUTH_TOKEN_LIFETIME = timedelta(minutes=30)
+REMEMBER_ME_TOKEN_LIFETIME = timedelta(days=7)
+
 # For authentication (login) tokens:
 def generate_auth_token(email, remember_me=False):
     user = User.query.filter_by(email=email).first()
     if not user:
         raise ValueError("User not found")
 
-    exp_time = timedelta(days=7) if remember_me else timedelta(minutes=30)
+    exp_time = REMEMBER_ME_TOKEN_LIFETIME if remember_me else AUTH_TOKEN_LIFETIME
     payload = {
         "id": user.id,
         "email": user.email,
         "is_admin": user.is_admin,
+        # "gen" is checked against the user's revocations, "jti" lets one token be revoked alone
+        "gen": user.token_generation or 0,
+        "jti": uuid.uuid4().hex,
         "exp": datetime.now(timezone.utc) + exp_time
     }
     return jwt.encode(payload, current_app.config['SECRET_KEY'], algorithm='HS256')